@@ -9,8 +9,34 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import reverse
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django's ASGI handler, except for the task event streams.
+
+    Django gives every request its own thread for the sync middleware
+    (asgiref's `ThreadSensitiveContext`), kept until the response ends.
+    An event stream stays open for hours, so that would park a thread per
+    connected client. Streams instead run the middleware on the shared
+    sync thread and hold no thread once streaming.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stream_paths = {reverse('todo:task-events')}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in self.stream_paths:
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+
+django.setup(set_prefix=False)
+application = StreamingASGIHandler()
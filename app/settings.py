@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 
@@ -57,6 +58,10 @@ CORS_ALLOWED_ORIGINS = [
       "http://localhost:5173",  # Allow your frontend origin
   ]
 
+CORS_ALLOW_HEADERS = [*default_headers, 'idempotency-key']
+
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Idempotent-Replayed']
+
 
 ROOT_URLCONF = 'app.urls'
 
@@ -79,13 +84,115 @@ TEMPLATES = [
 WSGI_APPLICATION = 'app.wsgi.application'
 
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them
+# after each request) and health checked before reuse.
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.getenv('DATABASE_URL')
+        default=os.getenv('DATABASE_URL'),
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        conn_health_checks=True,
+    )
+}
+
+# Read replicas, as comma separated DATABASE_REPLICA_URLS. Safe-method
+# reads of the task and profile views are sent to them by
+# todo.routers.ReplicaRouter; users who just wrote stick to the primary
+# for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')),
+        start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        conn_health_checks=True,
     )
+    # Tests read replicas through the primary, except local SQLite
+    # replicas, which get their own test database to exercise routing.
+    if DATABASES[alias].get('ENGINE') != 'django.db.backends.sqlite3':
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Task shards, as comma separated DATABASE_SHARD_URLS. Each user's tasks
+# live on one of TASK_SHARDS, chosen when the user is created (see
+# todo.sharding); users and everything else stay on `default`.
+TASK_SHARDS = ['default']
+for index, url in enumerate(
+        filter(None, os.getenv('DATABASE_SHARD_URLS', '').split(',')),
+        start=1):
+    alias = f'shard{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        conn_health_checks=True,
+    )
+    TASK_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ['todo.routers.ShardRouter', 'todo.routers.ReplicaRouter']
+
+for database in DATABASES.values():
+    if database.get('ENGINE') != 'django.db.backends.postgresql':
+        continue
+    database['OPTIONS'] = {
+        'sslmode': os.getenv('DB_SSLMODE', 'require'),
+    }
+    # Opt-in psycopg connection pool. The pool belongs to one worker
+    # process, so size it for that worker's threads: total connections
+    # are workers * DB_POOL_MAX_SIZE per database.
+    if os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# Seconds a cached task list or detail response is kept for.
+TASK_RESPONSE_CACHE_TIMEOUT = int(os.getenv('TASK_RESPONSE_CACHE_TIMEOUT', 300))
+
+
+# Days deleted tasks are remembered for delta sync clients, pruned by
+# `manage.py prune_tombstones`. Older sync tokens need a full resync.
+TASK_TOMBSTONE_RETENTION_DAYS = int(
+    os.getenv('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Server-Sent Events of task changes at /api/task/events/ (see
+# todo.events). The 'local' backend only reaches streams in the worker
+# that made the change; 'postgres' relays events between workers.
+TASK_EVENTS = {
+    'BACKEND': os.getenv('TASK_EVENTS_BACKEND', 'local'),
+    'HISTORY': int(os.getenv('TASK_EVENTS_HISTORY', 100)),
+    'KEEPALIVE': int(os.getenv('TASK_EVENTS_KEEPALIVE', 15)),
 }
 
-DATABASES['default']['OPTIONS'] = {'sslmode': 'require'}
+# Days after their last update that done tasks are moved to the archive
+# by `manage.py archive_tasks`.
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', 365))
+
+# Seconds the response of a write sent with an Idempotency-Key header is
+# replayed to its retries, pruned by `manage.py prune_idempotency_keys`,
+# and seconds a retry waits for the first request while it still runs.
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+IDEMPOTENCY_KEY_WAIT = int(os.getenv('IDEMPOTENCY_KEY_WAIT', 10))
+
+# Seconds delta sync holds back recent writes, so slow transactions that
+# commit after a client synced are not skipped.
+TASK_SYNC_SETTLE_SECONDS = int(os.getenv('TASK_SYNC_SETTLE_SECONDS', 2))
 
 
 # Password validation
@@ -126,6 +233,11 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Rendered OpenAPI schemas, built by `manage.py build_schema` or on the
+# first request to /api/schema/.
+SCHEMA_CACHE_DIR = os.getenv('SCHEMA_CACHE_DIR',
+                             os.path.join(BASE_DIR, 'schema_cache'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -136,7 +248,34 @@ AUTH_USER_MODEL = 'todo.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'todo.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+    # JSON through orjson when installed, and MessagePack on request.
+    'DEFAULT_RENDERER_CLASSES': [
+        'todo.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'todo.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'todo.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'todo.parsers.MessagePackParser',
+    ],
+}
+
+# Token -> user lookups cached by CachedTokenAuthentication. Deleted
+# tokens and saved users are dropped from the cache of the worker making
+# the change. With REDIS_URL every worker shares one cache, so the drop
+# reaches them all. Otherwise each worker keeps its own short-lived
+# copy, and other workers may accept a revoked token or a deactivated
+# user until their entry expires.
+TOKEN_AUTH_CACHE = {
+    'BACKEND': os.getenv('TOKEN_AUTH_CACHE_BACKEND',
+                         'django' if os.getenv('REDIS_URL') else 'local'),
+    'CACHE_ALIAS': 'default',
+    'MAX_SIZE': int(os.getenv('TOKEN_AUTH_CACHE_MAX_SIZE', 10000)),
+    'TIMEOUT': int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT',
+                             300 if os.getenv('REDIS_URL') else 5)),
+}
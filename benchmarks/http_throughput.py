@@ -0,0 +1,83 @@
+"""
+Compare concurrent-request throughput of two running deployments.
+
+Start the WSGI and the ASGI deployment side by side, e.g.:
+
+    gunicorn app.wsgi -w 4 -b 127.0.0.1:8001
+    DB_POOL=1 gunicorn app.asgi:application -k uvicorn.workers.UvicornWorker \
+        -w 4 -b 127.0.0.1:8002
+
+then point this script at the sync and the async endpoints:
+
+    python benchmarks/http_throughput.py --token <token> \
+        --url http://127.0.0.1:8001/api/task/ \
+        --url http://127.0.0.1:8002/api/async/task/
+
+Only the standard library is used, so it runs from any environment.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def worker(url, token, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+    headers = {'Authorization': f'Token {token}'}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(repr(exc))
+            connection.close()
+            connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def run(url, token, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker,
+                         args=(url, token, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(f'{url}\n'
+          f'  requests/s: {len(latencies) / duration:10.1f}\n'
+          f'  p50 ms:     {statistics.median(latencies or [0]) * 1000:10.1f}\n'
+          f'  p99 ms:     {p99 * 1000:10.1f}\n'
+          f'  errors:     {len(errors):10d}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', action='append', required=True)
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    for url in args.url:
+        run(url, args.token, args.concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare rows per second rendered by TaskSerializer and by the
+FastTaskSerializer read path, for 1k, 10k and 100k tasks.
+
+Rows are built in memory, so only serialization and JSON rendering are
+measured, not the database:
+
+    DJANGO_SECRET_KEY=x python benchmarks/serialize_tasks.py --sizes 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from todo.models import Task, User  # noqa: E402
+from todo.serializers import FastTaskSerializer, TaskSerializer  # noqa: E402
+from todo.utils import uuid7  # noqa: E402
+
+
+def make_tasks(owner, count):
+    now = timezone.now()
+    tasks = []
+    for index in range(count):
+        task = Task(id=uuid7(), name=f'Task {index}', done=index % 3 == 0,
+                    created_on=now - timedelta(seconds=index),
+                    updated_on=now - timedelta(seconds=index // 2),
+                    user_id=owner.pk)
+        Task.user.field.set_cached_value(task, owner)
+        tasks.append(task)
+    return tasks
+
+
+def bench(render, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = render()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    owner = User(pk=1, email='bench@example.com', name='Bench')
+    renderer = JSONRenderer()
+    serializer = TaskSerializer()
+    fast = FastTaskSerializer.build(serializer, owner)
+
+    print(f'{"rows":>8} {"serializer rows/s":>18} {"fast rows/s":>12} '
+          f'{"speedup":>8}')
+    for size in args.sizes:
+        tasks = make_tasks(owner, size)
+        rows = [tuple(getattr(task, column if column != 'user' else 'user_id')
+                      for column in fast.columns) for task in tasks]
+
+        slow_time, slow_content = bench(
+            lambda: renderer.render(TaskSerializer(tasks, many=True).data),
+            args.repeat)
+        fast_time, fast_content = bench(
+            lambda: renderer.render([fast.to_representation(row)
+                                     for row in rows]),
+            args.repeat)
+        assert slow_content == fast_content, 'outputs differ'
+
+        print(f'{size:>8} {size / slow_time:>18,.0f} {size / fast_time:>12,.0f} '
+              f'{slow_time / fast_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
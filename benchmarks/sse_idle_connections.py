@@ -0,0 +1,113 @@
+"""
+Measure how many idle task event streams one ASGI worker can hold.
+
+Start a single worker with a short keepalive, e.g.:
+
+    DB_POOL=1 TASK_EVENTS_KEEPALIVE=5 uvicorn app.asgi:application \
+        --workers 1 --port 8002 --log-level warning
+
+then open the streams, passing the worker's pid to report its memory:
+
+    python benchmarks/sse_idle_connections.py --token <token> \
+        --url http://127.0.0.1:8002/api/task/events/ \
+        --connections 5000 --pid <pid>
+
+Every stream is opened, must answer 200 and then stay open and keep
+receiving keepalives for `--hold` seconds. Raise `ulimit -n` on both
+sides for large counts. Only the standard library is used.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+def rss_mib(pid):
+    """Return the resident memory of `pid` in MiB, or None."""
+    if pid is None:
+        return None
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+async def open_stream(host, port, path, token, stats):
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+            f'Authorization: Token {token}\r\n'
+            f'Accept: text/event-stream\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        if b' 200 ' not in status_line:
+            stats['failed'] += 1
+            return
+        stats['open'] += 1
+        while chunk := await reader.read(4096):
+            stats['keepalives'] += chunk.count(b': keepalive')
+        stats['closed'] += 1
+    except OSError:
+        stats['failed'] += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run(url, token, connections, rate, hold, pid):
+    parts = urlsplit(url)
+    stats = {'open': 0, 'failed': 0, 'closed': 0, 'keepalives': 0}
+    baseline = rss_mib(pid)
+    start = time.perf_counter()
+    tasks = []
+    for _ in range(connections):
+        tasks.append(asyncio.create_task(open_stream(
+            parts.hostname, parts.port or 80, parts.path, token, stats)))
+        # Pace the connects so the listen backlog is not the limit.
+        await asyncio.sleep(1 / rate)
+    connect_time = time.perf_counter() - start
+
+    await asyncio.sleep(hold)
+    loaded = rss_mib(pid)
+    still_open = stats['open'] - stats['closed']
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f'{url}\n'
+          f'  requested:          {connections:10d}\n'
+          f'  opened:             {stats["open"]:10d}\n'
+          f'  failed:             {stats["failed"]:10d}\n'
+          f'  open after {hold:4.0f}s:   {still_open:10d}\n'
+          f'  keepalives read:    {stats["keepalives"]:10d}\n'
+          f'  connect time s:     {connect_time:10.1f}')
+    if baseline is not None and loaded is not None:
+        per_stream = (loaded - baseline) * 1024 / max(still_open, 1)
+        print(f'  worker RSS MiB:     {baseline:10.1f} -> {loaded:.1f}\n'
+              f'  KiB per stream:     {per_stream:10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=500,
+                        help='Connections opened per second.')
+    parser.add_argument('--hold', type=float, default=20,
+                        help='Seconds the streams are kept open.')
+    parser.add_argument('--pid', type=int,
+                        help='Pid of the worker to report the memory of.')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.token, args.connections, args.rate,
+                    args.hold, args.pid))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare bulk insert throughput and primary key index size of random
+(v4) and time-ordered (v7) UUID keys.
+
+Runs against the database configured by DATABASE_URL, in two scratch
+tables that are dropped afterwards:
+
+    DATABASE_URL=postgres://... python benchmarks/uuid_insert.py --rows 1000000
+
+Index sizes are reported on PostgreSQL only.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import django
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+
+from todo.utils import uuid7  # noqa: E402
+
+
+def bench(table, make_id, rows, batch_size):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        cursor.execute(
+            f'CREATE TABLE {table} (id uuid PRIMARY KEY, name varchar(255))')
+
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            batch = [(str(make_id()), f'Task {offset + i}')
+                     for i in range(min(batch_size, rows - offset))]
+            with transaction.atomic():
+                cursor.executemany(
+                    f'INSERT INTO {table} (id, name) VALUES (%s, %s)', batch)
+        elapsed = time.perf_counter() - start
+
+        size = None
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_relation_size(%s)', [f'{table}_pkey'])
+            size = cursor.fetchone()[0]
+        cursor.execute(f'DROP TABLE {table}')
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    for label, make_id in (('uuid4', uuid.uuid4), ('uuid7', uuid7)):
+        elapsed, size = bench(f'bench_{label}', make_id, args.rows,
+                              args.batch_size)
+        line = f'{label}: {args.rows / elapsed:10.0f} rows/s'
+        if size is not None:
+            line += f', pkey index {size / 1024 / 1024:8.1f} MiB'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
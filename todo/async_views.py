@@ -0,0 +1,207 @@
+"""
+Async views for the task and profile endpoints.
+
+DRF views are synchronous, so these are plain Django async views built
+on the async ORM. Under an ASGI server (`app.asgi`) a request waiting on
+the database no longer ties up a worker. They reuse the cached token
+authentication, the keyset pagination and the serializers of the sync
+endpoints, so responses are the same.
+
+`TaskEventsView` streams the user's task changes as Server-Sent Events;
+each open stream only holds a queue on the worker's event loop.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext as _, gettext_lazy
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework import exceptions, status
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.request import Request
+
+from todo.authentication import CachedTokenAuthentication
+from todo.events import aget_last_event_id, get_broker, get_options
+from todo.idempotency import aidempotent
+from todo.models import Task
+from todo.pagination import KeysetPagination
+from todo.parsers import FastJSONParser, MessagePackParser
+from todo.renderers import (EventStreamRenderer, FastJSONRenderer,
+                            MessagePackRenderer)
+from todo.routers import apin_to_primary
+from todo.serializers import TaskSerializer, UserSerializer
+
+
+class ASGIRequired(exceptions.APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = gettext_lazy('This endpoint is only served under ASGI.')
+    default_code = 'asgi_required'
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """
+    Base class for async JSON and MessagePack views requiring token
+    authentication.
+    """
+    authentication = CachedTokenAuthentication()
+    parser_classes = [FastJSONParser, FormParser, MultiPartParser,
+                      MessagePackParser]
+    renderer_classes = [FastJSONRenderer, MessagePackRenderer]
+    renderer = FastJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            # Wrap in a DRF request for `query_params`, `data` and the
+            # content negotiation only.
+            self.api_request = Request(
+                request, parsers=[parser() for parser in self.parser_classes])
+            self.renderer = DefaultContentNegotiation().select_renderer(
+                self.api_request,
+                [renderer() for renderer in self.renderer_classes])[0]
+            credentials = await self.authentication.aauthenticate(request)
+            if credentials is None:
+                raise exceptions.NotAuthenticated()
+            self.user, self.auth = credentials
+            request.user = self.user
+            response = await super().dispatch(request, *args, **kwargs)
+            # Let the sync views read this write from the primary.
+            if (request.method not in SAFE_METHODS
+                    and response.status_code < 400):
+                await apin_to_primary(self.user.pk)
+            return response
+        except exceptions.APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {'detail': detail}
+            response = self.render(detail, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated,
+                                exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = self.authentication.keyword
+            return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        response = HttpResponse(self.renderer.render(data), status=status_code,
+                                content_type=self.renderer.media_type)
+        # Kept like `Response.data`, to store idempotent responses.
+        response.data = data
+        return response
+
+
+class AsyncTaskListView(AsyncAPIView):
+    """List and create the tasks of the authenticated user."""
+
+    async def get(self, request):
+        paginator = KeysetPagination()
+        queryset = paginator.get_page_queryset(
+            Task.objects.for_user(self.user), self.api_request)
+        page = paginator.build_page(
+            [task async for task in queryset.aiterator()])
+        data = TaskSerializer(page, many=True).data
+        return self.render(paginator.get_paginated_response(data).data)
+
+    @aidempotent
+    async def post(self, request):
+        serializer = TaskSerializer(data=self.api_request.data)
+        serializer.is_valid(raise_exception=True)
+        task = await Task.objects.acreate(user=self.user,
+                                          **serializer.validated_data)
+        return self.render(TaskSerializer(task).data, status.HTTP_201_CREATED)
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+    """Retrieve a task of the authenticated user."""
+
+    async def get(self, request, pk):
+        try:
+            task = await Task.objects.for_user(self.user).aget(pk=pk)
+        except (Task.DoesNotExist, DjangoValidationError):
+            raise exceptions.NotFound(_('No Task matches the given query.'))
+        return self.render(TaskSerializer(task).data)
+
+
+class TaskEventsView(AsyncAPIView):
+    """
+    Stream `created`, `updated` and `deleted` events of the user's tasks.
+
+    A client reconnecting with a `Last-Event-ID` header, or the
+    `?last_event_id=` parameter, first gets the events it missed. If they
+    are no longer known it gets a `reset` event instead and should catch
+    up with `/api/task/changes/`, as after any other gap.
+    """
+    renderer_classes = [FastJSONRenderer, EventStreamRenderer]
+    # Milliseconds browsers wait before reconnecting.
+    retry = 3000
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            # A WSGI server drains the endless stream into a list, holding
+            # its worker until it is killed.
+            raise ASGIRequired()
+        value = (request.headers.get('Last-Event-ID')
+                 or self.api_request.query_params.get('last_event_id'))
+        try:
+            last_event_id = int(value) if value else None
+        except ValueError:
+            raise exceptions.ValidationError(
+                {'last_event_id': [_('A valid integer is required.')]})
+
+        response = StreamingHttpResponse(
+            self.stream(last_event_id),
+            content_type=EventStreamRenderer.media_type)
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx and similar proxies from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, last_event_id):
+        keepalive = get_options()['KEEPALIVE']
+        latest_event_id = await aget_last_event_id(self.user.pk)
+        # Subscribing in the stream ties unsubscribing to its end.
+        subscription, replay = get_broker().subscribe(
+            self.user.pk, last_event_id, latest_event_id)
+        try:
+            yield f'retry: {self.retry}\n\n'.encode()
+            if replay is None:
+                yield b'event: reset\ndata: {}\n\n'
+            else:
+                for event in replay:
+                    yield event.encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(),
+                                                   keepalive)
+                except asyncio.TimeoutError:
+                    # Comments keep idle connections from timing out.
+                    yield b': keepalive\n\n'
+                    continue
+                if subscription.overflowed:
+                    subscription.clear()
+                    yield b'event: reset\ndata: {}\n\n'
+                elif event is not None:
+                    yield event.encode()
+        finally:
+            get_broker().unsubscribe(subscription)
+
+
+class AsyncUserProfileView(AsyncAPIView):
+    """Retrieve and update the authenticated user."""
+
+    async def get(self, request):
+        return self.render(UserSerializer(self.user).data)
+
+    @aidempotent
+    async def patch(self, request):
+        serializer = UserSerializer(self.user, data=self.api_request.data,
+                                    partial=True)
+        # The unique email validator queries the database.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return self.render(serializer.data)
@@ -0,0 +1,192 @@
+"""
+Authentication classes for the todo app.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (TokenAuthentication,
+                                           get_authorization_header)
+
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'MAX_SIZE': 10000,
+    # Short, as invalidation does not reach the other workers' copies.
+    'TIMEOUT': 5,
+}
+
+
+class LocalTokenCache:
+    """
+    Bounded in-process LRU of token key -> user, with a TTL.
+    Each worker process keeps its own copy, which deletes in other
+    workers do not reach, so keep the TTL to a few seconds.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a copy of the cached user, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Hand out a copy so requests never share a mutable instance.
+        return copy.copy(user)
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, user):
+        self.set(key, user)
+
+
+class DjangoTokenCache:
+    """Token key -> user cache stored in a Django cache shared by workers."""
+    key_prefix = 'todo:auth-token:'
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(self.key_prefix + key)
+
+    def set(self, key, user):
+        self.cache.set(self.key_prefix + key, user, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(self.key_prefix + key)
+
+    def clear(self):
+        """Clearing is left to the cache's own eviction."""
+
+    async def aget(self, key):
+        return await self.cache.aget(self.key_prefix + key)
+
+    async def aset(self, key, user):
+        await self.cache.aset(self.key_prefix + key, user, self.timeout)
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """Return the token cache configured by `TOKEN_AUTH_CACHE`."""
+    global _token_cache
+    if _token_cache is None:
+        options = {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+        if options['BACKEND'] == 'django':
+            _token_cache = DjangoTokenCache(options['CACHE_ALIAS'],
+                                            options['TIMEOUT'])
+        else:
+            _token_cache = LocalTokenCache(options['MAX_SIZE'],
+                                           options['TIMEOUT'])
+    return _token_cache
+
+
+def is_token_cache_shared():
+    """
+    Whether deleting from the token cache reaches every worker process,
+    i.e. it is stored in a cache other than an in-process one.
+    """
+    cache = get_token_cache()
+    return (isinstance(cache, DjangoTokenCache)
+            and not isinstance(cache.cache, LocMemCache))
+
+
+def reset_token_cache(*, setting, **kwargs):
+    """Rebuild the cache when its settings change, e.g. in tests."""
+    global _token_cache
+    if setting in ('TOKEN_AUTH_CACHE', 'CACHES'):
+        _token_cache = None
+
+
+setting_changed.connect(reset_token_cache)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token -> user lookup, saving
+    the token and user join on every request.
+
+    Entries expire after `TOKEN_AUTH_CACHE['TIMEOUT']` seconds and are
+    dropped when the token is deleted or the user is saved (see
+    `todo.signals`). Changes made with `QuerySet.update()` send no
+    signals and are only picked up once the entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        user = cache.get(key)
+        if user is not None:
+            return (user, self.get_model()(key=key, user=user))
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(key, user)
+        return (user, token)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of `authenticate` for plain Django async views.
+        Takes a Django `HttpRequest` and returns `(user, token)` or None.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        cache = get_token_cache()
+        user = await cache.aget(key)
+        if user is not None:
+            return (user, self.get_model()(key=key, user=user))
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        await cache.aset(key, token.user)
+        return (token.user, token)
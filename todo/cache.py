@@ -0,0 +1,65 @@
+"""
+Per-user versioned caching of task responses.
+
+Every user has a task version counter. Cached responses are keyed by
+that version, so bumping it on any write makes all of the user's older
+entries unreachable without purging them; they simply expire.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+VERSION_KEY = 'todo:task-version:{user_id}'
+RESPONSE_KEY = 'todo:task-response:{user_id}:{version}:{digest}'
+
+
+def _initial_version():
+    # Start from the clock so a counter lost to eviction never restarts
+    # at a version that older entries are still cached under.
+    return time.time_ns() // 1000
+
+
+def get_task_version(user_id):
+    """Return the current task version of a user."""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def bump_task_version(user_id):
+    """
+    Invalidate the cached task responses of a user.
+
+    The version is bumped straight away and again once the transaction
+    commits, so a read that raced the write and cached pre-commit data
+    under the first bump is invalidated as well.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def get_response_key(user_id, url):
+    """Return the cache key of a response for the user's current version."""
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return RESPONSE_KEY.format(user_id=user_id,
+                               version=get_task_version(user_id),
+                               digest=digest)
+
+
+def get_response_timeout():
+    return getattr(settings, 'TASK_RESPONSE_CACHE_TIMEOUT', 300)
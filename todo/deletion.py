@@ -0,0 +1,80 @@
+"""
+Background deletion of user accounts.
+
+Deleting a user with many tasks in one request would hold a single long
+transaction over all of their rows. Instead the user is deactivated right
+away and an `AccountDeletion` job is queued in the database. The
+`manage.py delete_accounts` worker then deletes the user's rows in small
+batches, each its own short transaction, and finally the user. Every
+step can be repeated, so a job whose worker died is simply picked up
+again once its lease expires.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from todo.models import AccountDeletion, ArchivedTask, Task, TaskTombstone, User
+
+
+def schedule_account_deletion(user):
+    """Deactivate `user`, revoke their tokens and queue their deletion."""
+    with transaction.atomic():
+        # Saving the instance, rather than an update(), sends the signal
+        # dropping the user's cached tokens.
+        user = User.objects.select_for_update().get(pk=user.pk)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        Token.objects.filter(user=user).delete()
+        job, _ = AccountDeletion.objects.get_or_create(user=user)
+    return job
+
+
+def claim_account_deletion(lease):
+    """
+    Lock the oldest job no worker holds a lease on for `lease` seconds,
+    or return None if there is none.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            AccountDeletion.objects.select_for_update(skip_locked=True)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by('requested_on', 'pk').first()
+        )
+        if job is not None:
+            job.locked_until = now + timedelta(seconds=lease)
+            job.attempts += 1
+            job.save(update_fields=['locked_until', 'attempts'])
+    return job
+
+
+def run_account_deletion(job, batch_size, lease):
+    """
+    Delete the user of `job` and everything they own, `batch_size` rows
+    per transaction, renewing the lease after every batch. Return the
+    number of rows deleted.
+    """
+    deleted = 0
+    # Every shard is swept, so rows left behind by an interrupted shard
+    # rebalance are deleted too.
+    for shard in settings.TASK_SHARDS:
+        for model in (Task, ArchivedTask, TaskTombstone):
+            # Plain querysets skip the tombstones and counter updates.
+            rows = models.QuerySet(model).using(shard).filter(
+                user_id=job.user_id)
+            while pks := list(rows.values_list('pk', flat=True)[:batch_size]):
+                deleted += rows.filter(pk__in=pks).delete()[0]
+                AccountDeletion.objects.filter(pk=job.pk).update(
+                    locked_until=timezone.now() + timedelta(seconds=lease))
+
+    # Only a few rows are left, which deleting the user removes along
+    # with this job in one transaction.
+    user = User.objects.filter(pk=job.user_id).first()
+    if user is not None:
+        user.delete()
+    return deleted
@@ -0,0 +1,342 @@
+"""
+Server-Sent Events of task changes.
+
+Task writes publish compact `created`, `updated` and `deleted` events once
+their transaction commits. A queryset update of more tasks than the
+history keeps publishes a single `reset` per user instead. A broker fans
+them out to the event streams open in the process, and keeps the last
+few events of recently active users so a reconnecting client can resume
+from its `Last-Event-ID`.
+
+The broker is chosen by `TASK_EVENTS['BACKEND']`:
+
+* `local` reaches the streams of the publishing process only, which is
+  enough for a single ASGI worker.
+* `postgres` relays events between workers with LISTEN/NOTIFY on the
+  `DATABASE` alias, so any worker can hold a user's stream.
+* A dotted path to a `LocalBroker` subclass, built with the options.
+
+Event ids are per-user counters kept in the Django cache. The `postgres`
+backend requires a cache shared by the workers, e.g. Redis, so ids stay
+increasing across them.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from rest_framework.fields import DateTimeField
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'DATABASE': 'default',
+    'HISTORY': 100,
+    'MAX_USERS': 10000,
+    'QUEUE_SIZE': 200,
+    'KEEPALIVE': 15,
+}
+
+EVENT_ID_KEY = 'todo:task-event:{user_id}'
+
+_datetime_field = DateTimeField()
+
+
+class TaskEvent(namedtuple('TaskEvent', 'id kind data')):
+    """An event sent to the streams of a user."""
+
+    def encode(self):
+        data = json.dumps(self.data, separators=(',', ':'))
+        return f'id: {self.id}\nevent: {self.kind}\ndata: {data}\n\n'.encode()
+
+
+def task_event_data(task):
+    """Return the payload of a created or updated event for `task`."""
+    return {
+        'id': str(task.pk),
+        'name': task.name,
+        'done': task.done,
+        'created_on': _datetime_field.to_representation(task.created_on),
+        'updated_on': _datetime_field.to_representation(task.updated_on),
+    }
+
+
+def _reserve_event_ids(user_id, count):
+    """Reserve `count` consecutive event ids and return the first."""
+    key = EVENT_ID_KEY.format(user_id=user_id)
+    try:
+        last = cache.incr(key, count)
+    except ValueError:
+        # Start from the clock, so ids keep increasing when the counter
+        # is lost, like the task versions of `todo.cache`.
+        cache.add(key, time.time_ns() // 1000, None)
+        last = cache.incr(key, count)
+    return last - count + 1
+
+
+async def aget_last_event_id(user_id):
+    """Return the id of the last event published for `user_id`, or None."""
+    return await cache.aget(EVENT_ID_KEY.format(user_id=user_id))
+
+
+def publish_task_events(using, events):
+    """
+    Publish `(user_id, kind, data)` events once the transaction on the
+    `using` database commits, or straight away outside of one.
+    """
+    if events:
+        transaction.on_commit(partial(_publish, events), using=using)
+
+
+def _publish(events):
+    by_user = {}
+    for user_id, kind, data in events:
+        by_user.setdefault(user_id, []).append((kind, data))
+    broker = get_broker()
+    for user_id, user_events in by_user.items():
+        first = _reserve_event_ids(user_id, len(user_events))
+        try:
+            broker.publish(user_id, [
+                TaskEvent(first + index, kind, data)
+                for index, (kind, data) in enumerate(user_events)
+            ])
+        except Exception:
+            # Streams are best effort; the write itself has committed.
+            logger.exception('Could not publish task events.')
+
+
+class Subscription:
+    """A stream's queue of events, fed from any thread."""
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def offer(self, events):
+        """Queue `events`, or None if the stream missed some."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, events)
+        except RuntimeError:
+            # The stream's event loop has closed.
+            pass
+
+    def _put(self, events):
+        if events is None:
+            self.overflowed = True
+        else:
+            for event in events:
+                if self.queue.full():
+                    # A client too slow to keep up resyncs instead of
+                    # having its events buffered without bound.
+                    self.overflowed = True
+                    break
+                self.queue.put_nowait(event)
+        if self.overflowed and not self.queue.full():
+            # Wake the stream up to tell its client.
+            self.queue.put_nowait(None)
+
+    def clear(self):
+        """Drop the queued events, once the client is told to resync."""
+        self.overflowed = False
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """In-process fan-out of task events to the streams of each user."""
+
+    def __init__(self, history, max_users, queue_size, **options):
+        self.history_size = history
+        self.max_users = max_users
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._history = OrderedDict()
+        self._subscriptions = {}
+
+    def publish(self, user_id, events):
+        self.deliver(user_id, events)
+
+    def deliver(self, user_id, events):
+        """Hand published events to the user's streams in this process."""
+        with self._lock:
+            history = self._history.pop(user_id, None)
+            if history is None:
+                history = deque(maxlen=self.history_size)
+            self._history[user_id] = history
+            history.extend(events)
+            while len(self._history) > self.max_users:
+                self._history.popitem(last=False)
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.offer(events)
+
+    def subscribe(self, user_id, last_event_id=None, latest_event_id=None):
+        """
+        Subscribe to the events of `user_id` from a running event loop.
+
+        Return the subscription and the events after `last_event_id` to
+        replay first, or None instead of them if some are no longer known
+        and the client must resync. `latest_event_id` is the last id
+        published, from `aget_last_event_id()`.
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            history = list(self._history.get(user_id, ()))
+
+        if last_event_id is None:
+            return subscription, []
+        replay = sorted((event for event in history
+                         if event.id > last_event_id),
+                        key=lambda event: event.id)
+        # Ids are consecutive, so a gap means events were dropped from
+        # the history or never reached this process.
+        if [event.id for event in replay] != list(
+                range(last_event_id + 1, last_event_id + 1 + len(replay))):
+            return subscription, None
+        if (not replay and latest_event_id is not None
+                and latest_event_id > last_event_id):
+            return subscription, None
+        return subscription, replay
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def reset(self):
+        """Tell every stream of this process that it missed events."""
+        with self._lock:
+            subscriptions = [subscription for user_subscriptions
+                             in self._subscriptions.values()
+                             for subscription in user_subscriptions]
+        for subscription in subscriptions:
+            subscription.offer(None)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Relay task events between workers with PostgreSQL LISTEN/NOTIFY.
+
+    Every process holding streams listens on one dedicated connection and
+    delivers the notifications to its own streams.
+    """
+    channel = 'todo_task_events'
+    # NOTIFY payloads must stay under 8000 bytes.
+    max_payload = 7000
+
+    def __init__(self, database, **options):
+        if isinstance(caches['default'], LocMemCache):
+            # Each worker would count event ids on its own, so resuming
+            # from a `Last-Event-ID` would keep finding gaps.
+            raise ImproperlyConfigured(
+                'The postgres task event backend needs a cache shared by '
+                'the workers for its event ids, e.g. set REDIS_URL.')
+        super().__init__(**options)
+        self.database = database
+        self._listener = None
+
+    def publish(self, user_id, events):
+        with connections[self.database].cursor() as cursor:
+            for payload in self._payloads(user_id, events):
+                cursor.execute('SELECT pg_notify(%s, %s)',
+                               [self.channel, payload])
+
+    def _payloads(self, user_id, events):
+        batch, size = [], 0
+        for event in events:
+            item = json.dumps(list(event), separators=(',', ':'))
+            if batch and size + len(item) > self.max_payload:
+                yield f'[{user_id},[{",".join(batch)}]]'
+                batch, size = [], 0
+            batch.append(item)
+            size += len(item) + 1
+        if batch:
+            yield f'[{user_id},[{",".join(batch)}]]'
+
+    def subscribe(self, *args, **kwargs):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen,
+                                                  daemon=True)
+                self._listener.start()
+        return super().subscribe(*args, **kwargs)
+
+    def _listen(self):
+        reconnecting = False
+        while True:
+            try:
+                wrapper = connections.create_connection(self.database)
+                connection = wrapper.get_new_connection(
+                    wrapper.get_connection_params())
+                connection.autocommit = True
+                connection.execute(f'LISTEN {self.channel}')
+                if reconnecting:
+                    # Events sent while disconnected never arrive here.
+                    with self._lock:
+                        self._history.clear()
+                    self.reset()
+                    reconnecting = False
+                for notify in connection.notifies():
+                    user_id, events = json.loads(notify.payload)
+                    self.deliver(user_id,
+                                 [TaskEvent(*event) for event in events])
+            except Exception:
+                logger.exception('Task event listener failed, reconnecting.')
+                reconnecting = True
+                time.sleep(1)
+
+
+BACKENDS = {
+    'local': LocalBroker,
+    'postgres': PostgresBroker,
+}
+
+_broker = None
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'TASK_EVENTS', {})}
+
+
+def get_broker():
+    """Return the broker configured by `TASK_EVENTS`."""
+    global _broker
+    if _broker is None:
+        options = get_options()
+        backend = options['BACKEND']
+        broker_class = BACKENDS.get(backend) or import_string(backend)
+        _broker = broker_class(**{key.lower(): value
+                                  for key, value in options.items()
+                                  if key != 'BACKEND'})
+    return _broker
+
+
+def reset_broker(*, setting, **kwargs):
+    """Rebuild the broker when its settings change, e.g. in tests."""
+    global _broker
+    if setting == 'TASK_EVENTS':
+        _broker = None
+
+
+setting_changed.connect(reset_broker)
@@ -0,0 +1,55 @@
+"""
+Streaming export of tasks.
+"""
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+
+
+def iter_export(querysets, serializer, renderer, chunk_size=2000):
+    """
+    Yield the tasks of `querysets`, one after the other, rendered as a
+    JSON array, as NDJSON or as a stream of MessagePack objects, one
+    chunk of `chunk_size` rows at a time.
+
+    Rows are read with `QuerySet.iterator()`, so memory stays bounded by
+    the chunk size however many tasks are exported.
+    """
+    array = renderer.format == 'json'
+    if array:
+        yield b'['
+
+    rows = chain.from_iterable(queryset.iterator(chunk_size=chunk_size)
+                               for queryset in querysets)
+    first = True
+    while chunk := list(islice(rows, chunk_size)):
+        items = [renderer.render(serializer.to_representation(row))
+                 for row in chunk]
+        if array:
+            yield (b'' if first else b',') + b','.join(items)
+        else:
+            # NDJSON rows end with their newline and MessagePack objects
+            # follow each other without a separator.
+            yield b''.join(items)
+        first = False
+
+    if array:
+        yield b']'
+
+
+async def aiter_export(querysets, serializer, renderer, chunk_size=2000):
+    """
+    Async version of `iter_export` for ASGI servers, which would
+    otherwise read a sync iterator to the end before sending any of it.
+
+    Each chunk is fetched in the thread of the sync ORM, one at a time,
+    so memory stays bounded the same way.
+    """
+    chunks = iter_export(querysets, serializer, renderer, chunk_size)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Release the server side cursor if the client went away.
+        await sync_to_async(chunks.close)()
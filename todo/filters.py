@@ -0,0 +1,172 @@
+"""
+Filter backends for the todo app.
+"""
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class SparseFieldsetFilter(BaseFilterBackend):
+    """
+    Fetch only the columns needed for the `?fields=` selection of the
+    view, plus the ordering columns used by the keyset pagination.
+
+    The view must provide `get_sparse_fields()`, returning the requested
+    serializer field names or None when every field is wanted.
+    """
+    fields_param = 'fields'
+    fields_description = _('Comma separated list of the fields to return.')
+
+    def filter_queryset(self, request, queryset, view):
+        fields = view.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        model_fields = {field.name for field in
+                        queryset.model._meta.concrete_fields}
+        serializer_fields = view.get_serializer_class()().fields
+        columns = {serializer_fields[name].source.split('.')[0]
+                   for name in fields}
+        ordering = queryset.query.order_by or getattr(
+            view.pagination_class, 'ordering', ())
+        columns.update(field.lstrip('-') for field in ordering)
+        return queryset.only(*(columns & model_fields))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.fields_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.fields_description),
+                'schema': {'type': 'string'},
+            },
+        ]
+
+
+class TaskFilterSerializer(serializers.Serializer):
+    """Serializer for the task list query parameters."""
+    done = serializers.BooleanField(required=False, allow_null=True,
+                                    default=None)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(
+        choices=['created_on', '-created_on', 'updated_on', '-updated_on'],
+        required=False)
+
+
+class TaskFilter(BaseFilterBackend):
+    """
+    Filter tasks on `done` and on `created_on`/`updated_on` ranges, and
+    order them by either timestamp with `?ordering=`.
+
+    Every combination is an index range scan: the orderings are backed
+    by the (user, created_on, id) and (user, updated_on, id) indexes and
+    open tasks, the most requested list, by partial indexes restricted
+    to `done = false`.
+    """
+    lookups = {
+        'done': 'done',
+        'created_after': 'created_on__gte',
+        'created_before': 'created_on__lt',
+        'updated_after': 'updated_on__gte',
+        'updated_before': 'updated_on__lt',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = TaskFilterSerializer(data=request.query_params.dict())
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = queryset.filter(**{
+            lookup: params[name] for name, lookup in self.lookups.items()
+            if params.get(name) is not None
+        })
+        if 'ordering' in params:
+            ordering = params['ordering']
+            tiebreak = '-id' if ordering.startswith('-') else 'id'
+            queryset = queryset.order_by(ordering, tiebreak)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        types = {
+            serializers.BooleanField: {'type': 'boolean'},
+            serializers.DateTimeField: {'type': 'string',
+                                        'format': 'date-time'},
+        }
+        parameters = []
+        for name, field in TaskFilterSerializer().fields.items():
+            schema = types.get(type(field),
+                               {'type': 'string',
+                                'enum': list(getattr(field, 'choices', []))})
+            parameters.append({
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'schema': schema,
+            })
+        return parameters
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    """
+    Filter tasks whose name contains `?search=`, case insensitively.
+
+    On PostgreSQL the match is served by the trigram GIN index on
+    `UPPER(name)` and results are ranked by trigram similarity, best
+    first. Other databases fall back to a plain LIKE scan of the user's
+    tasks in the default order.
+    """
+    search_param = 'search'
+    search_description = _('Only return tasks whose name contains this text.')
+    max_length = 100
+
+    def get_search_term(self, request):
+        term = request.query_params.get(self.search_param, '').strip()
+        if len(term) > self.max_length:
+            raise ValidationError({self.search_param: [
+                _('Ensure this value has at most {max_length} characters.')
+                .format(max_length=self.max_length)]})
+        return term
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+
+        queryset = queryset.filter(name__icontains=term)
+        rank = self.get_rank(queryset, term)
+        if rank is not None:
+            queryset = queryset.annotate(rank=rank).order_by('-rank', '-id')
+        return queryset
+
+    def get_rank(self, queryset, term):
+        """
+        Return the expression ranking the matches of `term`, or None to
+        keep the default order.
+        """
+        if connections[queryset.db].vendor != 'postgresql':
+            return None
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        # similarity() returns a real, which does not compare equal to
+        # itself once read back into a float8 cursor value.
+        return Cast(TrigramSimilarity('name', term), FloatField())
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.search_description),
+                'schema': {'type': 'string'},
+            },
+        ]
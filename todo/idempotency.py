@@ -0,0 +1,229 @@
+"""
+Idempotency keys for retried writes.
+
+A client on a flaky network sends the same `Idempotency-Key` header with
+every retry of a POST or PATCH. The first request claims the key in the
+database, so the claim holds across workers, and runs the write. Its
+successful response is stored with the key for IDEMPOTENCY_KEY_TTL
+seconds and replayed to the retries instead of running the write again.
+
+A retry arriving while the first request still runs polls the key for up
+to IDEMPOTENCY_KEY_WAIT seconds for its response, then gets a 409. Claims
+are leased, so the key of a request that died is taken over once the
+lease expires. A request that fails releases its key and a retry runs
+afresh. A key is bound to the method, path and body it was first sent
+with.
+"""
+import asyncio
+import functools
+import hashlib
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from todo.models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# Seconds a claim is held for. A write running longer than this may be
+# run again by a retry.
+LEASE = 60
+POLL_INTERVAL = 0.05
+
+
+class KeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _(
+        'A request with this Idempotency-Key is still in progress.')
+    default_code = 'idempotency_key_in_use'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _(
+        'This Idempotency-Key was already used with a different request.')
+    default_code = 'idempotency_key_reused'
+
+
+def get_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400))
+
+
+def get_wait():
+    return getattr(settings, 'IDEMPOTENCY_KEY_WAIT', 10)
+
+
+def get_idempotency_key(request):
+    """Return the `Idempotency-Key` header of `request`, or None."""
+    key = request.headers.get(HEADER)
+    if key is None:
+        return None
+    max_length = IdempotencyKey._meta.get_field('key').max_length
+    if not key or len(key) > max_length:
+        raise ValidationError({HEADER: [
+            _('Ensure this header has 1 to {max_length} characters.').format(
+                max_length=max_length)]})
+    return key
+
+
+def get_fingerprint(request):
+    """Hash the method, path and body of `request`."""
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Claim `key` of `user`, None for anonymous requests, for a request.
+
+    Return `(record, True)` if the caller now holds the key and runs the
+    request, `(record, False)` if `record` holds the response to replay,
+    or `(None, False)` while another request holds the key.
+    """
+    while True:
+        now = timezone.now()
+        lease = now + timedelta(seconds=LEASE)
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, request_hash=fingerprint,
+                    locked_until=lease), True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # Released by a failed request since the insert.
+            continue
+        if record.created_on < now - get_ttl():
+            # Expired keys are free to reuse, even with another request.
+            IdempotencyKey.objects.filter(
+                pk=record.pk, created_on=record.created_on).delete()
+            continue
+        if record.request_hash != fingerprint:
+            raise KeyReused()
+        if record.status_code is not None:
+            return record, False
+        if record.locked_until < now and IdempotencyKey.objects.filter(
+                pk=record.pk, locked_until=record.locked_until,
+                ).update(locked_until=lease):
+            record.locked_until = lease
+            return record, True
+        return None, False
+
+
+def acquire_key(user, key, fingerprint):
+    """
+    Claim `key` like `claim_key`, waiting for a request holding it to
+    finish. Raise `KeyInUse` if it does not within IDEMPOTENCY_KEY_WAIT.
+    """
+    deadline = time.monotonic() + get_wait()
+    while True:
+        record, claimed = claim_key(user, key, fingerprint)
+        if record is not None:
+            return record, claimed
+        if time.monotonic() >= deadline:
+            raise KeyInUse()
+        time.sleep(POLL_INTERVAL)
+
+
+async def aacquire_key(user, key, fingerprint):
+    deadline = time.monotonic() + get_wait()
+    while True:
+        record, claimed = await sync_to_async(claim_key)(user, key,
+                                                         fingerprint)
+        if record is not None:
+            return record, claimed
+        if time.monotonic() >= deadline:
+            raise KeyInUse()
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def _held(record):
+    # The claim of `record`, unless its lease expired and was taken over.
+    return IdempotencyKey.objects.filter(pk=record.pk,
+                                         locked_until=record.locked_until)
+
+
+def finish_key(record, status_code, data):
+    """
+    Store a successful response for replay, or release the key so a
+    retry runs the request again.
+    """
+    if status.is_success(status_code):
+        _held(record).update(locked_until=None, status_code=status_code,
+                             response=data)
+    else:
+        release_key(record)
+
+
+def release_key(record):
+    _held(record).delete()
+
+
+def idempotent(handler):
+    """
+    Run a POST or PATCH handler of a DRF view at most once per
+    `Idempotency-Key`, replaying its response to retries.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = get_idempotency_key(request)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+
+        user = request.user if request.user.is_authenticated else None
+        record, claimed = acquire_key(user, key, get_fingerprint(request))
+        if not claimed:
+            return Response(record.response, status=record.status_code,
+                            headers={REPLAYED_HEADER: 'true'})
+        try:
+            # Writes to the default database commit together with the
+            # stored response.
+            with transaction.atomic():
+                response = handler(view, request, *args, **kwargs)
+                finish_key(record, response.status_code, response.data)
+        except BaseException:
+            release_key(record)
+            raise
+        return response
+    return wrapper
+
+
+def aidempotent(handler):
+    """`idempotent` for the handlers of async views, which `render` data."""
+    @functools.wraps(handler)
+    async def wrapper(view, request, *args, **kwargs):
+        key = get_idempotency_key(request)
+        if key is None:
+            return await handler(view, request, *args, **kwargs)
+
+        record, claimed = await aacquire_key(request.user, key,
+                                             get_fingerprint(request))
+        if not claimed:
+            response = view.render(record.response, record.status_code)
+            response[REPLAYED_HEADER] = 'true'
+            return response
+        try:
+            response = await handler(view, request, *args, **kwargs)
+        except BaseException:
+            await sync_to_async(release_key)(record)
+            raise
+        await sync_to_async(finish_key)(record, response.status_code,
+                                        response.data)
+        return response
+    return wrapper
@@ -0,0 +1,120 @@
+"""
+Streaming import of tasks from NDJSON or CSV files.
+"""
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from todo.models import Task
+from todo.serializers import TaskSerializer
+from todo.sharding import get_task_shard
+
+
+FORMATS = ('ndjson', 'csv')
+
+
+class InvalidEncoding(ValueError):
+    """The file is not valid UTF-8."""
+
+
+def guess_format(filename):
+    """Return the import format implied by a file name, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def check_encoding(binary_file, chunk_size=64 * 1024):
+    """
+    Raise `InvalidEncoding` unless `binary_file` is valid UTF-8, reading
+    it in chunks, then rewind it. Checked before importing, so a file
+    that fails to decode halfway leaves no batches behind.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        while chunk := binary_file.read(chunk_size):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise InvalidEncoding()
+    finally:
+        binary_file.seek(0)
+
+
+def iter_rows(binary_file, fmt):
+    """
+    Yield `(line, row)` pairs read incrementally from `binary_file`.
+    `row` is a dict, or None when the line could not be parsed.
+    """
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error:
+                # E.g. a field over `csv.field_size_limit()`. The reader
+                # carries on with the next line; DictReader only counts
+                # the lines of rows it returns.
+                yield reader.reader.line_num, None
+                continue
+            # Empty cells mean "use the default", as a missing key does.
+            yield reader.line_num, {k: v for k, v in row.items() if v != ''}
+
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def import_tasks(user, rows, batch_size=1000, max_errors=100):
+    """
+    Validate `rows` with the `TaskSerializer` rules and insert the valid
+    ones for `user` in `bulk_create` batches of `batch_size`, each in its
+    own transaction. Invalid rows are skipped and reported by line.
+
+    Returns a summary with the number of created and failed rows and the
+    first `max_errors` errors.
+    """
+    summary = {'created': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    shard = get_task_shard(user)
+
+    def flush():
+        with transaction.atomic(using=shard):
+            Task.objects.using(shard).bulk_create(batch)
+        summary['created'] += len(batch)
+        batch.clear()
+
+    for line, row in rows:
+        if row is None:
+            errors = {'non_field_errors': ['Invalid row.']}
+        else:
+            serializer = TaskSerializer(data=row)
+            if serializer.is_valid():
+                batch.append(Task(user=user, **serializer.validated_data))
+                if len(batch) >= batch_size:
+                    flush()
+                continue
+            errors = serializer.errors
+
+        summary['failed'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'line': line, 'errors': errors})
+
+    if batch:
+        flush()
+    return summary
@@ -0,0 +1,54 @@
+"""
+Move done tasks that have not changed in a long time to the archive.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from todo.cache import bump_task_version
+from todo.models import ArchivedTask, Task
+
+
+class Command(BaseCommand):
+    help = ('Move done tasks not updated for TASK_ARCHIVE_AFTER_DAYS to the '
+            'archive, one batch per transaction. Safe to interrupt and rerun.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.TASK_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        archived = 0
+        for shard in settings.TASK_SHARDS:
+            while moved := self.archive_batch(shard, cutoff,
+                                              options['batch_size']):
+                archived += moved
+
+        self.stdout.write(f'Archived {archived} tasks.')
+
+    def archive_batch(self, shard, cutoff, batch_size):
+        """Move up to `batch_size` tasks and return how many moved."""
+        # Plain querysets: archiving is no deletion, so it leaves no
+        # tombstones and the task counters as they are.
+        tasks = models.QuerySet(Task).using(shard)
+        with transaction.atomic(using=shard):
+            batch = list(
+                tasks.filter(done=True, updated_on__lt=cutoff)
+                .order_by('updated_on', 'id')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not batch:
+                return 0
+            # Copy and delete commit together, so an interrupted run
+            # leaves every task in exactly one of the tables.
+            models.QuerySet(ArchivedTask).using(shard).bulk_create(
+                [ArchivedTask.from_task(task) for task in batch])
+            tasks.filter(pk__in=[task.pk for task in batch]).delete()
+            for user_id in {task.user_id for task in batch}:
+                bump_task_version(user_id)
+        return len(batch)
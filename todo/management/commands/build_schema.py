@@ -0,0 +1,31 @@
+"""
+Render the OpenAPI schema into SCHEMA_CACHE_DIR ahead of the first request.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from todo.schema import remove_stale_schemas
+
+
+class Command(BaseCommand):
+    help = ('Prebuild the YAML and JSON OpenAPI schemas served by '
+            '/api/schema/ and delete the ones of older code versions.')
+
+    media_types = ['application/vnd.oai.openapi',
+                   'application/vnd.oai.openapi+json']
+
+    def handle(self, *args, **options):
+        removed = remove_stale_schemas()
+        path = reverse('api-schema')
+        view = resolve(path).func
+        factory = RequestFactory()
+        for media_type in self.media_types:
+            response = view(factory.get(path, HTTP_ACCEPT=media_type))
+            if response.status_code != 200:
+                raise CommandError(
+                    f'Building the {media_type} schema failed with '
+                    f'status {response.status_code}.')
+
+        self.stdout.write(f'Built {len(self.media_types)} schemas, '
+                          f'removed {removed} stale ones.')
@@ -0,0 +1,37 @@
+"""
+Worker running the queued account deletions.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo.deletion import claim_account_deletion, run_account_deletion
+
+
+class Command(BaseCommand):
+    help = ('Delete the accounts queued for deletion in small batches. '
+            'Several workers may run at once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--lease', type=int, default=300,
+            help='Seconds after which a job of a silent worker is retaken.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of polling.')
+        parser.add_argument('--poll-interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_account_deletion(options['lease'])
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            deleted = run_account_deletion(job, options['batch_size'],
+                                           options['lease'])
+            self.stdout.write(
+                f'Deleted user {job.user_id} and {deleted} of their rows.')
@@ -0,0 +1,40 @@
+"""
+Import tasks for a user from an NDJSON or CSV file.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.importer import (FORMATS, InvalidEncoding, check_encoding,
+                           guess_format, import_tasks, iter_rows)
+
+
+class Command(BaseCommand):
+    help = 'Import tasks for a user from an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user owning the tasks.')
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}.")
+
+        fmt = options['format'] or guess_format(options['path'])
+        if fmt is None:
+            raise CommandError('Could not tell the format, pass --format.')
+
+        with open(options['path'], 'rb') as binary_file:
+            try:
+                check_encoding(binary_file)
+            except InvalidEncoding:
+                raise CommandError('The file is not valid UTF-8.')
+            summary = import_tasks(user, iter_rows(binary_file, fmt),
+                                   options['batch_size'])
+
+        self.stdout.write(json.dumps(summary, indent=2))
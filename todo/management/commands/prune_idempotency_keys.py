@@ -0,0 +1,30 @@
+"""
+Delete idempotency keys older than IDEMPOTENCY_KEY_TTL.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todo.idempotency import get_ttl
+from todo.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys older than IDEMPOTENCY_KEY_TTL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - get_ttl()
+        keys = IdempotencyKey.objects.all()
+        deleted = 0
+        while True:
+            pks = list(
+                keys.filter(created_on__lt=cutoff)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not pks:
+                break
+            deleted += keys.filter(pk__in=pks).delete()[0]
+
+        self.stdout.write(f'Deleted {deleted} idempotency keys.')
@@ -0,0 +1,32 @@
+"""
+Delete task tombstones older than the sync retention period.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todo.models import TaskTombstone
+from todo.sync import get_retention
+
+
+class Command(BaseCommand):
+    help = 'Delete task tombstones older than TASK_TOMBSTONE_RETENTION_DAYS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - get_retention()
+        deleted = 0
+        for shard in settings.TASK_SHARDS:
+            tombstones = TaskTombstone.objects.using(shard)
+            while True:
+                pks = list(
+                    tombstones.filter(deleted_on__lt=cutoff)
+                    .values_list('pk', flat=True)[:options['batch_size']]
+                )
+                if not pks:
+                    break
+                deleted += tombstones.filter(pk__in=pks).delete()[0]
+
+        self.stdout.write(f'Deleted {deleted} tombstones.')
@@ -0,0 +1,99 @@
+"""
+Move a user's tasks, archived tasks and tombstones to another shard.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from todo.authentication import is_token_cache_shared
+from todo.cache import bump_task_version
+from todo.models import ArchivedTask, Task, TaskTombstone, User
+from todo.sharding import get_task_shard
+
+
+class Command(BaseCommand):
+    help = ("Move a user's tasks and tombstones to another of TASK_SHARDS. "
+            "The user is deactivated while their rows are copied.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Email or id of the user.')
+        parser.add_argument('shard', help='Database alias of the new shard.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        target = options['shard']
+        if target not in settings.TASK_SHARDS:
+            raise CommandError(f'{target!r} is not one of TASK_SHARDS.')
+        if not is_token_cache_shared():
+            # Workers would keep authenticating the user from their own
+            # cached copy, still active and on the old shard.
+            raise CommandError(
+                'Moving a user needs the token cache shared by every '
+                'worker: set REDIS_URL, or TOKEN_AUTH_CACHE BACKEND to '
+                '"django" with a shared cache.')
+        lookup = options['user']
+        try:
+            user = User.objects.get(
+                **{'pk' if lookup.isdigit() else 'email': lookup})
+        except User.DoesNotExist:
+            raise CommandError(f'User {lookup!r} does not exist.')
+        source = get_task_shard(user) or 'default'
+        if source == target:
+            self.stdout.write(f'{user.email} is already on {target}.')
+            return
+
+        # Deactivating locks the user out while the rows move; saving also
+        # drops their cached tokens from the shared cache, so no request
+        # uses the old shard.
+        was_active = user.is_active
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        try:
+            self.delete(user, target)
+            with transaction.atomic(using=target):
+                tasks = self.copy(Task, user, source, target,
+                                  options['batch_size'],
+                                  ['created_on', 'updated_on'])
+                tasks += self.copy(ArchivedTask, user, source, target,
+                                   options['batch_size'], ['archived_on'])
+                tombstones = self.copy(TaskTombstone, user, source, target,
+                                       options['batch_size'], ['deleted_on'])
+            user.task_shard = target
+        finally:
+            user.is_active = was_active
+            user.save(update_fields=['is_active', 'task_shard'])
+        self.delete(user, source)
+        bump_task_version(user.pk)
+
+        self.stdout.write(f'Moved {tasks} tasks and {tombstones} tombstones '
+                          f'of {user.email} from {source} to {target}.')
+
+    def delete(self, user, shard):
+        # Plain querysets, so moving leaves no tombstones and keeps the
+        # task counters as they are.
+        for model in (Task, ArchivedTask, TaskTombstone):
+            models.QuerySet(model).using(shard).filter(user=user).delete()
+
+    def copy(self, model, user, source, target, batch_size, timestamps):
+        """Copy the user's rows of `model`, keeping their timestamps."""
+        rows = (models.QuerySet(model).using(source).filter(user=user)
+                .order_by('pk').iterator(chunk_size=batch_size))
+        copied = 0
+        while batch := list(islice(rows, batch_size)):
+            saved = [[getattr(obj, name) for name in timestamps]
+                     for obj in batch]
+            if model is TaskTombstone:
+                # Tombstone ids come from each shard's own sequence.
+                for obj in batch:
+                    obj.pk = None
+            models.QuerySet(model).using(target).bulk_create(batch)
+            # bulk_create stamps auto_now fields, so put the originals back.
+            for obj, values in zip(batch, saved):
+                for name, value in zip(timestamps, values):
+                    setattr(obj, name, value)
+            models.QuerySet(model).using(target).bulk_update(batch,
+                                                             timestamps)
+            copied += len(batch)
+        return copied
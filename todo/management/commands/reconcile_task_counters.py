@@ -0,0 +1,57 @@
+"""
+Recount users' tasks and fix any drift in the denormalized counters.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from todo.models import ArchivedTask, Task, User
+from todo.sharding import get_task_shard
+
+
+class Command(BaseCommand):
+    help = 'Recompute task_count and done_task_count from the task table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = 0
+        last_pk = 0
+        while True:
+            users = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('task_count', 'done_task_count', 'task_shard')
+                [:options['batch_size']]
+            )
+            if not users:
+                break
+
+            # Count on each shard, since tasks may not live with users.
+            by_shard = {}
+            for user in users:
+                by_shard.setdefault(get_task_shard(user), []).append(user.pk)
+            # Archived tasks still count, so add up both tables.
+            counts = {}
+            for shard, pks in by_shard.items():
+                for model in (Task, ArchivedTask):
+                    rows = (
+                        model.objects.using(shard).filter(user_id__in=pks)
+                        .values('user_id').order_by()
+                        .annotate(total=Count('pk'),
+                                  total_done=Count('pk', filter=Q(done=True)))
+                        .values_list('user_id', 'total', 'total_done')
+                    )
+                    for user_id, total, total_done in rows:
+                        old_total, old_done = counts.get(user_id, (0, 0))
+                        counts[user_id] = (old_total + total,
+                                           old_done + total_done)
+
+            for user in users:
+                total, total_done = counts.get(user.pk, (0, 0))
+                current = (user.task_count, user.done_task_count)
+                if current != (total, total_done):
+                    fixed += User.objects.filter(pk=user.pk).update(
+                        task_count=total, done_task_count=total_done)
+            last_pk = users[-1].pk
+
+        self.stdout.write(f'Fixed the task counters of {fixed} users.')
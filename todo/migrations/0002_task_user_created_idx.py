@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_on', 'id'], name='task_user_created_idx'),
+        ),
+    ]
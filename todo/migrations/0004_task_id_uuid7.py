@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:37
+
+import todo.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_task_tombstones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.UUIDField(default=todo.utils.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
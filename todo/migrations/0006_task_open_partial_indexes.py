@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_task_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('done', False)), fields=['user', 'created_on', 'id'], name='task_user_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('done', False)), fields=['user', 'updated_on', 'id'], name='task_user_open_updated_idx'),
+        ),
+    ]
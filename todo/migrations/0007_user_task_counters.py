@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:42
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_task_counters(apps, schema_editor):
+    """Count each user's existing tasks into the new columns."""
+    User = apps.get_model('todo', 'User')
+    users = User.objects.annotate(
+        total=Count('task'),
+        total_done=Count('task', filter=Q(task__done=True)),
+    ).values_list('pk', 'total', 'total_done')
+    for pk, total, total_done in users.iterator():
+        if total:
+            User.objects.filter(pk=pk).update(
+                task_count=total, done_task_count=total_done)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_task_open_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='done_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
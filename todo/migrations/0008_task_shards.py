@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def assign_default_shard(apps, schema_editor):
+    """Existing tasks are all on `default`, so keep their users there."""
+    User = apps.get_model('todo', 'User')
+    User.objects.using(schema_editor.connection.alias).update(
+        task_shard='default')
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_user_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='task_shard',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tasktombstone',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(assign_default_shard, migrations.RunPython.noop),
+    ]
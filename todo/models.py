@@ -1,8 +1,10 @@
 """Database Models."""
-import uuid
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
+from django.db.models.query import ModelIterable
 from django.core import validators
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -10,6 +12,14 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from rest_framework.utils import encoders
+
+from todo.cache import bump_task_version
+from todo.events import (get_options as get_event_options, publish_task_events,
+                         task_event_data)
+from todo.sharding import get_task_shard, is_sharded
+from todo.utils import uuid7
+
 
 
 class UserManager(BaseUserManager):
@@ -49,7 +59,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     preferred_theme = models.CharField(max_length=10, choices=[('light', 'Light'), ('dark', 'Dark')], default='light')
-
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+    done_task_count = models.PositiveIntegerField(default=0, editable=False)
+    task_shard = models.CharField(max_length=64, blank=True, editable=False)
 
     objects = UserManager()
 
@@ -59,9 +71,205 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.name
     
     
+def adjust_task_counters(deltas):
+    """
+    Apply `{user_id: (total, done)}` deltas to the users' task counters.
+    The F() expressions make concurrent adjustments add up instead of
+    overwriting each other.
+
+    The counters live on `default`. For tasks on another shard they are
+    adjusted outside the transaction writing the tasks, so a failure in
+    between leaves them off until `manage.py reconcile_task_counters`.
+    """
+    for user_id, (total, done) in deltas.items():
+        if total or done:
+            User.objects.filter(pk=user_id).update(
+                task_count=F('task_count') + total,
+                done_task_count=F('done_task_count') + done,
+            )
+
+
+def _add_delta(deltas, user_id, total, done):
+    old_total, old_done = deltas.get(user_id, (0, 0))
+    deltas[user_id] = (old_total + total, old_done + done)
+
+
+class OwnedTaskIterable(ModelIterable):
+    """Yield tasks with their already known owner attached."""
+
+    def __iter__(self):
+        owner = self.queryset._owner
+        user_field = self.queryset.model.user.field
+        for task in super().__iter__():
+            user_field.set_cached_value(task, owner)
+            yield task
+
+
+class OwnedTaskQuerySet(models.QuerySet):
+    """QuerySet for models holding the tasks of a user."""
+    _owner = None
+
+    def for_user(self, user):
+        """
+        Return the tasks of `user` with `task.user` pre-populated, so
+        serializing the owner costs neither a query per row nor a join.
+        """
+        queryset = self.filter(user=user)
+        if is_sharded():
+            queryset = queryset.using(get_task_shard(user))
+        queryset._owner = user
+        queryset._iterable_class = OwnedTaskIterable
+        return queryset
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._owner = self._owner
+        return clone
+
+
+class TaskQuerySet(OwnedTaskQuerySet):
+    """QuerySet for tasks."""
+    
+    def _split_by_shard(self, objs, get_shard):
+        """
+        Group `objs` by shard, or return None if the queryset already
+        targets a database or tasks are not sharded.
+        """
+        if self._db is not None or not is_sharded():
+            return None
+        groups = {}
+        for obj in objs:
+            groups.setdefault(get_shard(obj), []).append(obj)
+        return groups
+    
+    def create(self, **kwargs):
+        if self._db is None and is_sharded():
+            # QuerySet.create() saves to self.db, routed without knowing
+            # the task, so pick the shard from an instance first.
+            shard = router.db_for_write(self.model,
+                                        instance=self.model(**kwargs))
+            return self.using(shard).create(**kwargs)
+        return super().create(**kwargs)
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        groups = self._split_by_shard(
+            objs, lambda obj: get_task_shard(
+                Task.user.field.get_cached_value(obj, None) or obj.user_id))
+        if groups is not None:
+            for shard, group in groups.items():
+                self.using(shard).bulk_create(group, *args, **kwargs)
+            return objs
+        
+        deltas = {}
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            for obj in objs:
+                _add_delta(deltas, obj.user_id, 1, int(obj.done))
+            adjust_task_counters(deltas)
+            publish_task_events(self.db, [
+                (obj.user_id, 'created', task_event_data(obj)) for obj in objs
+            ])
+        for user_id in deltas:
+            bump_task_version(user_id)
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if 'updated_on' not in fields:
+            # Stamp the change like update(), and on the objects too, so
+            # they match the stored rows.
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_on = now
+            fields = [*fields, 'updated_on']
+        groups = self._split_by_shard(
+            objs, lambda obj: obj._state.db
+            or get_task_shard(obj.user_id))
+        if groups is not None:
+            return sum(self.using(shard).bulk_update(group, fields,
+                                                     *args, **kwargs)
+                       for shard, group in groups.items())
+        # Django writes each batch with update(), which counts the flipped
+        # tasks and publishes the stored rows.
+        return super().bulk_update(objs, fields, *args, **kwargs)
+    
+    def update(self, **kwargs):
+        # Stamp the change, so delta sync and conditional requests see it.
+        kwargs.setdefault('updated_on', timezone.now())
+        deltas = {}
+        with transaction.atomic(using=self.db):
+            before = None
+            if isinstance(kwargs.get('done'), bool):
+                flipping = (self.exclude(done=kwargs['done'])
+                            .select_for_update()
+                            .values_list('user_id', flat=True))
+                for user_id in flipping:
+                    _add_delta(deltas, user_id, 0,
+                               1 if kwargs['done'] else -1)
+            elif 'done' in kwargs:
+                # An expression, e.g. ~F('done'), so compare the locked
+                # rows before and after the update to count the flips.
+                before = {pk: (user_id, done) for pk, user_id, done in
+                          self.select_for_update()
+                          .values_list('pk', 'user_id', 'done')}
+            # Updates of more tasks than there are events to keep are not
+            # read back; the users' streams are told to resync instead.
+            limit = get_event_options()['HISTORY']
+            pks = list(self.values_list('pk', flat=True)[:limit + 1])
+            if len(pks) > limit:
+                pks = None
+                user_ids = set(self.values_list('user_id', flat=True)
+                               .order_by().distinct())
+            rows = super().update(**kwargs)
+            if before:
+                after = (self.model._base_manager.using(self.db)
+                         .filter(pk__in=before).values_list('pk', 'done'))
+                for pk, done in after:
+                    user_id, was_done = before[pk]
+                    if done != was_done:
+                        _add_delta(deltas, user_id, 0, 1 if done else -1)
+            adjust_task_counters(deltas)
+            if pks is None:
+                events = [(user_id, 'reset', {}) for user_id in user_ids]
+            else:
+                # Read the rows back, as the new values may be expressions.
+                tasks = list(self.model._base_manager.using(self.db)
+                             .filter(pk__in=pks))
+                user_ids = {task.user_id for task in tasks}
+                events = [(task.user_id, 'updated', task_event_data(task))
+                          for task in tasks]
+            publish_task_events(self.db, events)
+        for user_id in user_ids:
+            bump_task_version(user_id)
+        return rows
+    
+    def delete(self):
+        """Delete the tasks, leaving a tombstone for each of them."""
+        deltas = {}
+        with transaction.atomic(using=self.db):
+            rows = list(self.select_for_update()
+                        .values_list('pk', 'user_id', 'done'))
+            result = super().delete()
+            TaskTombstone.objects.using(self.db).bulk_create(
+                TaskTombstone(task_id=pk, user_id=user_id)
+                for pk, user_id, _ in rows
+            )
+            for _, user_id, done in rows:
+                _add_delta(deltas, user_id, -1, -int(done))
+            adjust_task_counters(deltas)
+            publish_task_events(self.db, [
+                (user_id, 'deleted', {'id': str(pk)})
+                for pk, user_id, _ in rows
+            ])
+        for user_id in deltas:
+            bump_task_version(user_id)
+        return result
+
+
 class Task(models.Model):
     """Task model."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, 
+    id = models.UUIDField(primary_key=True, default=uuid7, 
          editable=False)
     name = models.CharField(max_length=255, validators=[
         validators.MinLengthValidator(limit_value=3, message='Task name should be minimum 3 characters.')
@@ -69,5 +277,180 @@ class Task(models.Model):
     done = models.BooleanField(default=False)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Tasks may live on another database than their user, so there is no
+    # foreign key constraint and signals delete them with the user.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING,
+                             db_constraint=False)
+
+    objects = TaskQuerySet.as_manager()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'done' in field_names:
+            instance._loaded_done = instance.done
+        return instance
     
+    def _done_may_have_changed(self, update_fields):
+        if update_fields is not None and 'done' not in update_fields:
+            return False
+        if 'done' in self.get_deferred_fields():
+            return False
+        return getattr(self, '_loaded_done', None) != self.done
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            flipped = False
+            if not adding and self._done_may_have_changed(
+                    kwargs.get('update_fields')):
+                # Only count a toggle if this save is the one flipping the
+                # stored value; a stale copy toggling it again is a no-op.
+                flipped = Task._base_manager.using(using).filter(
+                    pk=self.pk).exclude(done=self.done).update(
+                        done=self.done) > 0
+            super().save(*args, **{**kwargs, 'using': using})
+            if adding:
+                adjust_task_counters({self.user_id: (1, int(self.done))})
+            elif flipped:
+                adjust_task_counters(
+                    {self.user_id: (0, 1 if self.done else -1)})
+            publish_task_events(using, [
+                (self.user_id, 'created' if adding else 'updated',
+                 task_event_data(self))
+            ])
+        self._loaded_done = self.done
+        bump_task_version(self.user_id)
+        
+    def delete(self, *args, **kwargs):
+        task_id, user_id = self.pk, self.user_id
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            # Count the stored value, not the one this copy was loaded with.
+            done = (Task._base_manager.using(using).select_for_update()
+                    .filter(pk=task_id).values_list('done', flat=True)
+                    .first())
+            result = super().delete(*args, **{**kwargs, 'using': using})
+            if result[0]:
+                TaskTombstone.objects.using(using).create(task_id=task_id,
+                                                          user_id=user_id)
+                adjust_task_counters({user_id: (-1, -int(done))})
+                publish_task_events(using, [
+                    (user_id, 'deleted', {'id': str(task_id)})
+                ])
+        bump_task_version(user_id)
+        return result
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_on', 'id'],
+                         name='task_user_created_idx'),
+            models.Index(fields=['user', 'updated_on', 'id'],
+                         name='task_user_updated_idx'),
+            models.Index(fields=['user', 'created_on', 'id'],
+                         condition=models.Q(done=False),
+                         name='task_user_open_created_idx'),
+            models.Index(fields=['user', 'updated_on', 'id'],
+                         condition=models.Q(done=False),
+                         name='task_user_open_updated_idx'),
+            # Finds the tasks `manage.py archive_tasks` moves out.
+            models.Index(fields=['updated_on', 'id'],
+                         condition=models.Q(done=True),
+                         name='task_done_updated_idx'),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """
+    A done task moved out of the task table by `manage.py archive_tasks`,
+    keeping its id and timestamps. Archived tasks still count towards the
+    user's task counters and are read-only.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    name = models.CharField(max_length=255)
+    done = models.BooleanField(default=True)
+    created_on = models.DateTimeField()
+    updated_on = models.DateTimeField()
+    archived_on = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING,
+                             db_constraint=False)
+
+    objects = OwnedTaskQuerySet.as_manager()
+
+    @classmethod
+    def from_task(cls, task):
+        return cls(id=task.id, name=task.name, done=task.done,
+                   created_on=task.created_on, updated_on=task.updated_on,
+                   user_id=task.user_id)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_on', 'id'],
+                         name='archived_user_created_idx'),
+            models.Index(fields=['user', 'updated_on', 'id'],
+                         name='archived_user_updated_idx'),
+        ]
+
+
+class TaskTombstone(models.Model):
+    """Record of a deleted task, kept for delta sync clients."""
+    task_id = models.UUIDField()
+    deleted_on = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING,
+                             db_constraint=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_on', 'id'],
+                         name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_on'],
+                         name='tombstone_deleted_idx'),
+        ]
+
+
+class AccountDeletion(models.Model):
+    """
+    A queued deletion of a deactivated user, run in batches by
+    `manage.py delete_accounts`. Deleting the user removes the job.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    requested_on = models.DateTimeField(auto_now_add=True)
+    # Lease of the worker running the job; expired leases are retaken.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response of a write sent with an `Idempotency-Key` header, replayed
+    to retries carrying the same key (see `todo.idempotency`). Keys sent
+    without authentication, e.g. on registration, have no user.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, null=True, blank=True,
+                             on_delete=models.CASCADE)
+    # Hash of the method, path and body the key was first sent with.
+    request_hash = models.CharField(max_length=64)
+    created_on = models.DateTimeField(auto_now_add=True)
+    # Lease of the request running the write; null once it is done.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True,
+                                encoder=encoders.JSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'],
+                                    condition=models.Q(user__isnull=False),
+                                    name='idempotency_user_key_uniq'),
+            models.UniqueConstraint(fields=['key'],
+                                    condition=models.Q(user__isnull=True),
+                                    name='idempotency_anonymous_key_uniq'),
+        ]
+        indexes = [
+            # Finds the expired keys `manage.py prune_idempotency_keys`
+            # deletes.
+            models.Index(fields=['created_on'],
+                         name='idempotency_created_idx'),
+        ]
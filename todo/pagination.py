@@ -0,0 +1,288 @@
+"""
+Pagination classes for the todo app.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _reverse_ordering(ordering):
+    """Flip the direction of every field in an ordering tuple."""
+    return tuple(
+        field[1:] if field.startswith('-') else '-' + field
+        for field in ordering
+    )
+
+
+def encode_value(value):
+    """Make an ordering value JSON serializable."""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+def decode_value(value):
+    """Reverse `encode_value`."""
+    if isinstance(value, dict):
+        parsed = parse_datetime(value.get('dt', ''))
+        if parsed is None:
+            raise ValueError('Invalid datetime in cursor.')
+        return parsed
+    return value
+
+
+def decode_position(values, model, ordering, annotations=None):
+    """
+    Reverse `encode_value` on a position, converting every value with
+    the `model` field it orders on, or the output field of the queryset
+    annotation of that name in `annotations`. Raise ValueError, TypeError,
+    ValidationError or FieldDoesNotExist if the values do not fit the
+    fields.
+    """
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Position does not match the ordering.')
+    annotations = annotations or {}
+    position = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        if name in annotations:
+            output_field = annotations[name].output_field
+        else:
+            output_field = model._meta.get_field(name)
+        value = output_field.to_python(decode_value(value))
+        if value is None or (isinstance(value, datetime)
+                             and timezone.is_naive(value)):
+            raise ValueError('Invalid position value.')
+        position.append(value)
+    return position
+
+
+def get_position(row, ordering):
+    """Return the values of the ordering fields for a row."""
+    position = []
+    for field in ordering:
+        name = field.lstrip('-')
+        if isinstance(row, dict):
+            position.append(row[name])
+        else:
+            position.append(getattr(row, name))
+    return position
+
+
+def merge_rows(querysets, ordering):
+    """
+    Merge the rows of querysets sorted by the same `ordering` into one
+    sorted list, keeping the first of rows at the same position.
+    """
+    rows, seen = [], set()
+    for queryset in querysets:
+        for row in queryset:
+            position = tuple(get_position(row, ordering))
+            if position not in seen:
+                seen.add(position)
+                rows.append(row)
+    # Stable sorts from the last field to the first sort on all of them.
+    for field in reversed(ordering):
+        rows.sort(key=lambda row: get_position(row, [field])[0],
+                  reverse=field.startswith('-'))
+    return rows
+
+
+def keyset_filter(ordering, position):
+    """
+    Build the filter selecting the rows that come after `position`.
+
+    For an ordering (a, b) this is `a > x OR (a = x AND b > y)`, with the
+    comparison flipped on descending fields, so the database can seek
+    straight to the start of the page through an index on the same columns.
+    """
+    query = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = '__lt' if field.startswith('-') else '__gt'
+        clause = Q(**{name + lookup: position[index]})
+        for previous, value in zip(ordering[:index], position[:index]):
+            clause &= Q(**{previous.lstrip('-'): value})
+        query |= clause
+    return query
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering columns.
+
+    Unlike OFFSET, or the offset kept by DRF's `CursorPagination` for ties,
+    every page is a bounded index range scan, so fetching page 1000 costs
+    the same as fetching page one. The ordering must end on a unique
+    field so positions are never ambiguous.
+    """
+    cursor_query_param = 'cursor'
+    cursor_query_description = _('The pagination cursor value.')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    page_size_query_description = _('Number of results to return per page.')
+    max_page_size = 500
+    invalid_cursor_message = _('Invalid cursor')
+    ordering = ('-created_on', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.build_page(list(queryset))
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Paginate several querysets as one, e.g. tasks and archived tasks,
+        fetching the page from each and merging them in the ordering.
+        """
+        pages = [self.get_page_queryset(queryset, request, view)
+                 for queryset in querysets]
+        return self.build_page(merge_rows(pages, pages[0].query.order_by))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the unevaluated queryset for the requested page.
+
+        Split from `build_page` so callers that fetch rows themselves,
+        e.g. with the async ORM, can share the cursor handling.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request, queryset)
+
+        reverse, position = self.cursor or (False, None)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        # Fetch one extra row to find out whether another page follows.
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, rows):
+        """Trim the fetched rows to a page and work out the links."""
+        reverse = self.cursor is not None and self.cursor[0]
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """Use the queryset ordering if one was applied, else the default."""
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request, queryset):
+        """
+        Return a `(reverse, position)` tuple, or None for the first page.
+        The position values are converted by the model fields or the
+        annotations of `queryset` they order on, so a forged cursor cannot
+        reach the database.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = decode_position(payload['p'], queryset.model,
+                                       self.ordering,
+                                       queryset.query.annotations)
+            return bool(payload.get('r')), position
+        except (TypeError, ValueError, KeyError, AttributeError,
+                ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, reverse, position):
+        """Return the url for the page starting after `position`."""
+        payload = {'p': [encode_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, get_position(self.page[-1], self.ordering))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, get_position(self.page[0], self.ordering))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.cursor_query_description),
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.page_size_query_description),
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,112 @@
+"""
+Database routing between the primary and the read replicas.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from todo.sharding import SHARDED_MODELS, get_task_shard, is_sharded
+
+
+_read_database = ContextVar('todo_read_database', default=None)
+
+
+def get_pin_key(user_id):
+    return f'todo:db-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for REPLICA_PIN_SECONDS."""
+    cache.set(get_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(get_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(get_pin_key(user_id), False)
+
+
+class ShardRouter:
+    """
+    Send task and tombstone queries to the shard of their user, found
+    from the instance hint: a task, a tombstone or, for `user.task_set`,
+    the user.
+
+    Shards are migrated like `default`, so every migration applies
+    unchanged, but only their task and tombstone tables are used.
+    """
+
+    def _get_shard(self, model, instance):
+        if (instance is None or not is_sharded()
+                or model._meta.model_name not in SHARDED_MODELS):
+            return None
+        if instance._meta.model_name not in SHARDED_MODELS:
+            return get_task_shard(instance)
+        if instance._state.db is not None:
+            return instance._state.db
+        user = type(instance).user.field.get_cached_value(instance, None)
+        if user is None and instance.user_id is None:
+            return None
+        return get_task_shard(user or instance.user_id)
+
+    def db_for_read(self, model, **hints):
+        return self._get_shard(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._get_shard(model, hints.get('instance'))
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica chosen for the current request, if any,
+    and everything else to the primary.
+
+    Only views using `ReplicaReadMixin` choose a replica, so reads which
+    must be fresh, e.g. token authentication or the reads of a write,
+    stay on the primary by default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests of an API view from a read replica, unless
+    the user wrote recently. Successful writes pin the user to the
+    primary, so they always read their own writes.
+    """
+    use_read_replica = True
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user_id = request.user.pk
+        if (self.use_read_replica and settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and not is_pinned(user_id)):
+            _read_database.set(random.choice(settings.DATABASE_REPLICAS))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        user = getattr(request, 'user', None)
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and user is not None and user.is_authenticated):
+            pin_to_primary(user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,150 @@
+"""
+Precomputed OpenAPI schema.
+
+drf-spectacular introspects every view and serializer to build the
+schema, which takes hundreds of milliseconds. Rendered schemas are
+instead kept in memory and in `SCHEMA_CACHE_DIR`, keyed by a hash of the
+code, so they are built once per deployment: by `manage.py build_schema`
+or by the first request.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from importlib.metadata import version as package_version
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from drf_spectacular.views import SpectacularAPIView
+
+
+SOURCE_PACKAGES = ['app', 'todo']
+LIBRARIES = ['Django', 'djangorestframework', 'drf-spectacular']
+
+_memory = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_code_hash():
+    """
+    Hash the project sources, the versions of the libraries generating
+    the schema and their settings. Any change gives new cache keys.
+    """
+    digest = hashlib.md5()
+    for package in SOURCE_PACKAGES:
+        for path in sorted(Path(settings.BASE_DIR, package).rglob('*.py')):
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+            digest.update(path.read_bytes())
+    for library in LIBRARIES:
+        digest.update(f'{library}=={package_version(library)}'.encode())
+    digest.update(repr(getattr(settings, 'SPECTACULAR_SETTINGS', None)).encode())
+    digest.update(repr(getattr(settings, 'REST_FRAMEWORK', None)).encode())
+    return digest.hexdigest()
+
+
+def get_cache_dir():
+    return Path(settings.SCHEMA_CACHE_DIR)
+
+
+def clear_schema_cache():
+    """Forget the schemas held in memory, e.g. between tests."""
+    _memory.clear()
+    get_code_hash.cache_clear()
+
+
+def _write_file(path, content):
+    """
+    Write `content` to `path` through a temporary file of its own, so
+    processes building the schema at once never write into the same file
+    and readers only ever see a complete one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name,
+                                       suffix='.tmp', delete=False)
+    try:
+        with temp:
+            temp.write(content)
+        os.replace(temp.name, path)
+    except BaseException:
+        Path(temp.name).unlink(missing_ok=True)
+        raise
+
+
+def get_cached_schema(key, build):
+    """
+    Return `(content, etag)` of the rendered schema stored under `key`,
+    calling `build()` for the content on a miss in memory and on disk.
+    """
+    name = hashlib.md5(repr((get_code_hash(),) + key).encode()).hexdigest()
+    cached = _memory.get(name)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        if name in _memory:
+            return _memory[name]
+        path = get_cache_dir() / f'{get_code_hash()}-{name}'
+        try:
+            content = path.read_bytes()
+        except OSError:
+            content = build()
+            try:
+                _write_file(path, content)
+            except OSError:
+                # A read-only filesystem only loses the disk cache.
+                pass
+        _memory[name] = (content, quote_etag(name))
+    return _memory[name]
+
+
+def remove_stale_schemas():
+    """Delete the cached schema files of other code versions."""
+    removed = 0
+    prefix = get_code_hash() + '-'
+    for path in get_cache_dir().glob('*'):
+        if not path.name.startswith(prefix):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    `SpectacularAPIView` serving the rendered schema from the cache,
+    with an ETag so clients can revalidate it for free.
+    """
+
+    def _get_schema_response(self, request):
+        version = (self.api_version or request.version
+                   or self._get_version_parameter(request))
+        renderer = request.accepted_renderer
+        indent = None
+        if hasattr(renderer, 'get_indent'):
+            indent = renderer.get_indent(request.accepted_media_type, {})
+        key = (type(self).__module__, type(self).__qualname__, version,
+               translation.get_language(), renderer.media_type, indent)
+
+        def build():
+            response = super(CachedSpectacularAPIView,
+                             self)._get_schema_response(request)
+            return renderer.render(response.data, request.accepted_media_type,
+                                   self.get_renderer_context())
+
+        content, etag = get_cached_schema(key, build)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, version)}"')
+        response['ETag'] = etag
+        return response
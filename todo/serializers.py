@@ -5,9 +5,13 @@ from django.contrib.auth import (get_user_model,
                                  authenticate)
 from django.utils.translation import gettext as _
 
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
-from todo.models import Task
+from todo.models import Task, TaskTombstone
+
+
+MAX_BULK_TASKS = 500
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -28,17 +32,38 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
     
     def update(self, instance, validated_data):
-        """Update and return the user."""
-        password = self.validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        """
+        Update and return the user, saving only the validated fields.
+        The instance may be cached or read at the start of the request,
+        so saving it whole would write back stale task counters.
+        """
+        password = validated_data.pop('password', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        fields = list(validated_data)
         
         if password:
             instance.set_password(password)
-            instance.save()
-            
-        return user
+            fields.append('password')
+        
+        instance.save(update_fields=fields)
+        return instance
   
   
+class UserTaskStatsSerializer(serializers.ModelSerializer):
+    """Serializer for the user's denormalized task counters."""
+    total = serializers.IntegerField(source='task_count')
+    open = serializers.SerializerMethodField()
+    done = serializers.IntegerField(source='done_task_count')
+    
+    class Meta:
+        model = get_user_model()
+        fields = ['total', 'open', 'done']
+    
+    def get_open(self, obj) -> int:
+        return obj.task_count - obj.done_task_count
+
+
 class AuthTokenSerializer(serializers.Serializer):
     """Serializer for the user auth token foe logging in."""
     email = serializers.EmailField()
@@ -65,10 +90,152 @@ class AuthTokenSerializer(serializers.Serializer):
         return attrs
     
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskListSerializer(serializers.ListSerializer):
+    """Serializer for a list of tasks, created in a single query."""
+    
+    def create(self, validated_data):
+        """Create all the tasks with one bulk insert."""
+        return Task.objects.bulk_create(
+            [Task(**attrs) for attrs in validated_data]
+        )
+
+
+class SparseFieldsetMixin:
+    """
+    Only include the fields listed in the `fields` context entry, when
+    one is given, e.g. from the `?fields=` query parameter.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items()
+                if name in requested}
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Task."""
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = Task
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        list_serializer_class = TaskListSerializer
+
+
+class TaskUserIdSerializer(TaskSerializer):
+    """Serializer for Task representing the owner by id only."""
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def _datetime_converter(field):
+    """
+    Return a function rendering datetimes like `field.to_representation`
+    does with the ISO 8601 format, with the target timezone looked up
+    once instead of for every value.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = (field.timezone if hasattr(field, 'timezone')
+                      else field.default_timezone())
+    if (output_format is None or output_format.lower() != ISO_8601
+            or field_timezone is None):
+        return field.to_representation
+
+    def convert(value):
+        if not value:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+class FastTaskSerializer:
+    """
+    Read-only stand-in for a task serializer, rendering `values_list`
+    rows straight into dicts with one precomputed converter per field.
+
+    The output is the same as the serializer's, without building a model
+    instance and going through DRF's per-field machinery for every row.
+    The owner is rendered once, since every row belongs to `owner`.
+    Use `build()`, which returns None when the serializer has a field
+    this class cannot reproduce exactly.
+    """
+    converters = {
+        serializers.BooleanField: None,
+        serializers.CharField: None,
+        serializers.DateTimeField: _datetime_converter,
+        serializers.UUIDField: lambda field: (
+            str if field.uuid_format == 'hex_verbose'
+            else field.to_representation),
+    }
+
+    def __init__(self, plan, columns):
+        self.plan = plan
+        self.columns = columns
+
+    @classmethod
+    def build(cls, serializer, owner):
+        plan, columns = [], []
+        for field in serializer._readable_fields:
+            if field.source == '*' or '.' in field.source:
+                return None
+            if field.source == 'user' and isinstance(
+                    field, serializers.BaseSerializer):
+                plan.append((field.field_name, None,
+                             field.to_representation(owner)))
+                continue
+            if type(field) is serializers.PrimaryKeyRelatedField:
+                if field.pk_field is not None:
+                    return None
+                convert = None
+            elif type(field) in cls.converters:
+                make_converter = cls.converters[type(field)]
+                convert = make_converter and make_converter(field)
+            else:
+                return None
+            plan.append((field.field_name, len(columns), convert))
+            columns.append(field.source)
+        return cls(plan, columns)
+
+    def to_representation(self, row):
+        data = {}
+        for name, index, convert in self.plan:
+            if index is None:
+                # A constant, e.g. the owner's representation.
+                data[name] = convert
+                continue
+            value = row[index]
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the ids of the tasks to delete."""
+    ids = serializers.ListField(child=serializers.UUIDField(),
+                                allow_empty=False,
+                                max_length=MAX_BULK_TASKS)
+
+
+class TaskTombstoneSerializer(serializers.ModelSerializer):
+    """Serializer for a deleted task."""
+    id = serializers.UUIDField(source='task_id')
+    
+    class Meta:
+        model = TaskTombstone
+        fields = ['id', 'deleted_on']
+
+
+class TaskImportSerializer(serializers.Serializer):
+    """Serializer for a task import upload."""
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000,
+                                          default=1000)
@@ -0,0 +1,40 @@
+"""
+User-keyed sharding of tasks.
+
+Users and everything else live on the `default` database. The tasks,
+archived tasks and tombstones of a user all live on one of `TASK_SHARDS`,
+recorded in `User.task_shard` when the user is created, so adding shards
+later does not move existing users. `manage.py rebalance_task_shard` moves a user
+to another shard.
+"""
+from django.conf import settings
+
+
+SHARDED_MODELS = {'task', 'tasktombstone', 'archivedtask'}
+
+
+def is_sharded():
+    return len(settings.TASK_SHARDS) > 1
+
+
+def shard_for_user_id(user_id):
+    """Deterministically map a new user to a shard."""
+    shards = settings.TASK_SHARDS
+    return shards[user_id % len(shards)]
+
+
+def get_task_shard(user):
+    """
+    Return the database alias holding the tasks of `user`, a user or a
+    user id, or None without sharding so the routers decide, e.g. to
+    read from a replica.
+    """
+    if not is_sharded():
+        return None
+    if not hasattr(user, 'task_shard'):
+        from todo.models import User
+
+        user = User.objects.using('default').only('task_shard').get(pk=user)
+    if user.task_shard in settings.TASK_SHARDS:
+        return user.task_shard
+    return shard_for_user_id(user.pk)
@@ -0,0 +1,54 @@
+"""
+Signal handlers for the todo app.
+"""
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from todo.authentication import get_token_cache
+from todo.cache import bump_task_version
+from todo.models import ArchivedTask, Task, TaskTombstone
+from todo.sharding import get_task_shard, shard_for_user_id
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Drop a deleted or rotated token from the auth cache."""
+    get_token_cache().delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Drop the cached tokens of a saved user, so deactivation, password
+    changes and profile edits are seen on the next request.
+
+    The task version is bumped too, as cached task responses embed the
+    owner. A new account also starts on a fresh version even if its id
+    was used before, e.g. after a database restore.
+    """
+    bump_task_version(instance.id)
+    if created:
+        if not instance.task_shard:
+            instance.task_shard = shard_for_user_id(instance.pk)
+            sender.objects.filter(pk=instance.pk).update(
+                task_shard=instance.task_shard)
+        return
+    cache = get_token_cache()
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        cache.delete(key)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def delete_user_tasks(sender, instance, **kwargs):
+    """
+    Delete the tasks, archived tasks and tombstones of a deleted user from
+    their shard, which the database cannot cascade to.
+    """
+    shard = get_task_shard(instance)
+    for model in (Task, ArchivedTask, TaskTombstone):
+        # The plain queryset skips the tombstones and counter updates.
+        models.QuerySet(model).using(shard).filter(user=instance).delete()
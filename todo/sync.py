@@ -0,0 +1,107 @@
+"""
+Delta sync of a user's tasks.
+
+A sync token holds two keyset positions: the `(updated_on, id)` of the
+last task sent and the `(deleted_on, id)` of the last tombstone sent.
+Each call returns the tasks and tombstones after those positions, so a
+client replica is kept current in O(changes) instead of O(tasks).
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from todo.models import Task, TaskTombstone
+from todo.pagination import decode_position, encode_value, keyset_filter
+from todo.sharding import get_task_shard
+
+
+TASK_ORDERING = ('updated_on', 'id')
+TOMBSTONE_ORDERING = ('deleted_on', 'id')
+
+
+class InvalidToken(ValueError):
+    """The sync token could not be decoded."""
+
+
+class ExpiredToken(Exception):
+    """Tombstones after the sync token have been pruned."""
+
+
+def encode_token(task_position, tombstone_position):
+    payload = {
+        't': task_position and [encode_value(v) for v in task_position],
+        'd': [encode_value(v) for v in tombstone_position],
+    }
+    return urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode('ascii')
+    ).decode('ascii')
+
+
+def decode_token(token):
+    """
+    Return the `(task_position, tombstone_position)` of a token, with
+    values checked against the fields they order on.
+    """
+    try:
+        payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+        task_position = payload['t'] and decode_position(
+            payload['t'], Task, TASK_ORDERING)
+        tombstone_position = decode_position(
+            payload['d'], TaskTombstone, TOMBSTONE_ORDERING)
+    except (TypeError, ValueError, KeyError, AttributeError,
+            ValidationError):
+        raise InvalidToken()
+    return task_position, tombstone_position
+
+
+def get_retention():
+    return timedelta(days=getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def get_changes(user, token=None, limit=500):
+    """
+    Return `(tasks, deleted, next_token, has_more)` for the changes of
+    `user` since `token`, or a full snapshot when no token is given.
+
+    Rows written in the last `TASK_SYNC_SETTLE_SECONDS` are held back
+    until the next call, so a transaction that committed late with an
+    older timestamp is not skipped.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(
+        seconds=getattr(settings, 'TASK_SYNC_SETTLE_SECONDS', 2))
+    if token is None:
+        task_position, tombstone_position = None, [horizon, 0]
+    else:
+        task_position, tombstone_position = decode_token(token)
+        if tombstone_position[0] < now - get_retention():
+            raise ExpiredToken()
+
+    tasks = Task.objects.for_user(user).filter(updated_on__lte=horizon)
+    if task_position:
+        tasks = tasks.filter(keyset_filter(TASK_ORDERING, task_position))
+    tasks = list(tasks.order_by(*TASK_ORDERING)[:limit + 1])
+
+    tombstones = TaskTombstone.objects.using(get_task_shard(user)).filter(
+        keyset_filter(TOMBSTONE_ORDERING, tombstone_position),
+        user=user, deleted_on__lte=horizon,
+    ).order_by(*TOMBSTONE_ORDERING)
+    tombstones = list(tombstones[:limit + 1])
+
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+    if tasks:
+        task_position = [tasks[-1].updated_on, tasks[-1].id]
+    if len(tombstones) == limit:
+        tombstone_position = [tombstones[-1].deleted_on, tombstones[-1].id]
+    else:
+        # Caught up: move to the horizon so the token keeps within the
+        # retention period even while nothing is being deleted.
+        tombstone_position = [horizon, 0]
+
+    next_token = encode_token(task_position, tombstone_position)
+    return tasks, tombstones, next_token, has_more
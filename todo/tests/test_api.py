@@ -168,6 +168,7 @@ class PrivateUserApiTests(TestCase):
 
 class TaskAPITest(TestCase):
     """Test cases for task endpoints."""
+    databases = '__all__'
     def setUp(self):
         self.client = APIClient()
         self.user = create_user(email='testuser@example.com', password='testpassword')
@@ -179,7 +180,7 @@ class TaskAPITest(TestCase):
         response = self.client.get(TASK_URL)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_create_task(self):
         """Test task creation successful."""
@@ -190,7 +191,7 @@ class TaskAPITest(TestCase):
         response = self.client.post(TASK_URL, data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 2)
         self.assertEqual(response.data['name'], data['name'])
 
     def test_update_task(self):
@@ -214,7 +215,7 @@ class TaskAPITest(TestCase):
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Task.objects.count(), 0)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 0)
 
     def test_unauthenticated_access(self):
         """Test access to unauthenticated user."""
@@ -0,0 +1,197 @@
+"""Test archiving old done tasks and reading them back."""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from todo.models import ArchivedTask, Task, TaskTombstone
+from todo.sharding import get_task_shard
+
+
+TASK_URL = reverse('todo:task-list')
+EXPORT_URL = reverse('todo:task-export')
+
+
+def detail_url(task_id):
+    return reverse('todo:task-detail', args=[task_id])
+
+
+def create_task(user, age_days=0, **params):
+    """Create a task last updated `age_days` ago."""
+    defaults = {'name': 'Sample task'}
+    defaults.update(params)
+    task = Task.objects.create(user=user, **defaults)
+    if age_days:
+        Task.objects.for_user(user).filter(pk=task.pk).update(
+            updated_on=timezone.now() - timedelta(days=age_days))
+        task.refresh_from_db()
+    return task
+
+
+def archive(**options):
+    out = StringIO()
+    call_command('archive_tasks', stdout=out, **options)
+    return out.getvalue()
+
+
+class ArchiveCommandTests(TestCase):
+    """Test cases for the archive_tasks command."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='archive@example.com', password='testpass123')
+
+    def test_archives_old_done_tasks(self):
+        """Test only done tasks older than the cutoff are moved."""
+        old_done = create_task(self.user, age_days=400, done=True)
+        create_task(self.user, age_days=400)
+        create_task(self.user, age_days=10, done=True)
+
+        self.assertIn('Archived 1 tasks.', archive())
+
+        self.assertFalse(
+            Task.objects.for_user(self.user).filter(pk=old_done.pk).exists())
+        archived = ArchivedTask.objects.for_user(self.user).get()
+        self.assertEqual(
+            (archived.pk, archived.name, archived.created_on,
+             archived.updated_on, archived.user_id),
+            (old_done.pk, old_done.name, old_done.created_on,
+             old_done.updated_on, self.user.pk))
+        self.assertEqual(Task.objects.for_user(self.user).count(), 2)
+
+    def test_batches_and_days(self):
+        """Test every batch is moved and `--days` sets the cutoff."""
+        for _ in range(5):
+            create_task(self.user, age_days=10, done=True)
+
+        self.assertIn('Archived 0 tasks.', archive())
+        self.assertIn('Archived 5 tasks.', archive(days=7, batch_size=2))
+
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+        self.assertEqual(ArchivedTask.objects.for_user(self.user).count(), 5)
+
+    def test_no_tombstones_and_counters_kept(self):
+        """Test archiving is not a deletion."""
+        create_task(self.user, age_days=400, done=True)
+
+        archive()
+
+        self.assertFalse(TaskTombstone.objects.using(
+            get_task_shard(self.user)).exists())
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.task_count, self.user.done_task_count),
+                         (1, 1))
+        call_command('reconcile_task_counters', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.task_count, self.user.done_task_count),
+                         (1, 1))
+
+    def test_deleting_user_deletes_archive(self):
+        """Test a deleted user's archived tasks go with them."""
+        create_task(self.user, age_days=400, done=True)
+        archive()
+        archived = ArchivedTask.objects.for_user(self.user)
+
+        self.user.delete()
+
+        self.assertFalse(archived.exists())
+
+
+class ArchivedTaskApiTests(TestCase):
+    """Test reading archived tasks through the task API."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='archive@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        # Created oldest first, so the default order is the reverse.
+        self.tasks = [create_task(self.user, name=f'Task {index}',
+                                  done=index % 2 == 0,
+                                  age_days=400 if index % 2 == 0 else 0)
+                      for index in range(5)]
+        archive()
+        self.archived = self.tasks[0]
+
+    def test_archived_hidden_by_default(self):
+        """Test lists and details leave out archived tasks."""
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual([task['id'] for task in res.data['results']],
+                         [str(self.tasks[3].pk), str(self.tasks[1].pk)])
+        res = self.client.get(detail_url(self.archived.pk))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_includes_archived(self):
+        """Test the list merges archived tasks in order across pages."""
+        ids, url = [], TASK_URL + '?include_archived=true&page_size=2'
+        while url:
+            res = self.client.get(url)
+            ids += [task['id'] for task in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(ids, [str(task.pk) for task in reversed(self.tasks)])
+
+        res = self.client.get(res.data['previous'])
+        self.assertEqual([task['id'] for task in res.data['results']],
+                         [str(self.tasks[2].pk), str(self.tasks[1].pk)])
+
+    def test_list_includes_archived_serialized(self):
+        """Test archived tasks render like tasks with every serializer."""
+        res = self.client.get(
+            TASK_URL, {'include_archived': 'true', 'user_repr': 'id',
+                       'done': 'true', 'ordering': 'created_on'})
+
+        self.assertEqual(res.data['results'][0], {
+            'id': str(self.archived.pk),
+            'name': 'Task 0',
+            'done': True,
+            'created_on': res.data['results'][0]['created_on'],
+            'updated_on': res.data['results'][0]['updated_on'],
+            'user': self.user.pk,
+        })
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_retrieve_archived(self):
+        """Test an archived task is found with the flag."""
+        res = self.client.get(detail_url(self.archived.pk),
+                              {'include_archived': 'true'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Task 0')
+        self.assertIn('ETag', res)
+
+    def test_archived_are_read_only(self):
+        """Test writes never reach an archived task."""
+        res = self.client.patch(
+            detail_url(self.archived.pk) + '?include_archived=true',
+            {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_flag(self):
+        """Test a value that is not a boolean is rejected."""
+        res = self.client.get(TASK_URL, {'include_archived': 'maybe'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('include_archived', res.data)
+
+    def test_export_includes_archived(self):
+        """Test the export streams archived tasks after the others."""
+        res = self.client.get(EXPORT_URL, {'include_archived': 'true',
+                                           'format': 'ndjson'})
+        lines = b''.join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 5)
+        self.assertIn(str(self.archived.pk), lines[2])
@@ -0,0 +1,101 @@
+"""Test the async task and profile endpoints."""
+import json
+
+import msgpack
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+from rest_framework import status
+
+from todo.authentication import get_token_cache
+from todo.models import Task
+
+
+ASYNC_TASK_URL = reverse('todo:async-task-list')
+ASYNC_PROFILE_URL = reverse('todo:async-profile')
+
+
+class AsyncViewTests(TestCase):
+    """Test cases for the async views."""
+    databases = '__all__'
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com', password='testpass123', name='Async')
+        token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {token.key}'}
+        self.task = Task.objects.create(user=self.user, name='Async task')
+
+    async def test_list_tasks(self):
+        """Test listing tasks through the async view."""
+        res = await self.async_client.get(ASYNC_TASK_URL,
+                                          headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual([task['id'] for task in data['results']],
+                         [str(self.task.id)])
+        self.assertEqual(data['results'][0]['user']['name'], 'Async')
+
+    async def test_list_tasks_msgpack(self):
+        """Test the async list negotiates MessagePack."""
+        json_res = await self.async_client.get(ASYNC_TASK_URL,
+                                               headers=self.headers)
+        res = await self.async_client.get(
+            ASYNC_TASK_URL,
+            headers={**self.headers, 'Accept': 'application/msgpack'})
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content),
+                         json.loads(json_res.content))
+
+    async def test_create_task(self):
+        """Test creating a task through the async view."""
+        res = await self.async_client.post(
+            ASYNC_TASK_URL, {'name': 'Created async'},
+            content_type='application/json', headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            await Task.objects.for_user(self.user).filter(
+                name='Created async').aexists())
+
+    async def test_create_invalid_task(self):
+        """Test validation errors are returned as 400."""
+        res = await self.async_client.post(
+            ASYNC_TASK_URL, {'name': 'ab'},
+            content_type='application/json', headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.json())
+
+    async def test_retrieve_task_and_missing_task(self):
+        """Test retrieving a task and a task that does not exist."""
+        url = reverse('todo:async-task-detail', args=[self.task.id])
+        res = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(res.json()['name'], 'Async task')
+
+        url = reverse('todo:async-task-detail', args=['not-a-uuid'])
+        res = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_profile_get_and_patch(self):
+        """Test reading and updating the profile asynchronously."""
+        res = await self.async_client.patch(
+            ASYNC_PROFILE_URL, {'name': 'Renamed'},
+            content_type='application/json', headers=self.headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = await self.async_client.get(ASYNC_PROFILE_URL,
+                                          headers=self.headers)
+        self.assertEqual(res.json()['name'], 'Renamed')
+
+    async def test_authentication_required(self):
+        """Test requests without a token are rejected."""
+        res = await self.async_client.get(ASYNC_TASK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
@@ -0,0 +1,101 @@
+"""Test the cached token authentication."""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo.authentication import LocalTokenCache, get_token_cache
+
+
+USER_PROFILE_URL = reverse('todo:profile')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test cases for caching token lookups."""
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='token@example.com', password='testpass123', name='Token')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        """Test a cached token needs no query to authenticate."""
+        with self.assertNumQueries(1):
+            self.client.get(USER_PROFILE_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached entry."""
+        self.client.get(USER_PROFILE_URL)
+        self.token.delete()
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating the user invalidates the cached entry."""
+        self.client.get(USER_PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_seen_on_next_request(self):
+        """Test a changed user is reloaded instead of served stale."""
+        self.client.get(USER_PROFILE_URL)
+        self.client.patch(USER_PROFILE_URL, {'password': 'newpassword123'})
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_token_cache().get(self.token.key)
+        self.assertTrue(user.check_password('newpassword123'))
+
+    @override_settings(TOKEN_AUTH_CACHE={'BACKEND': 'django'})
+    def test_django_cache_backend(self):
+        """Test tokens can be cached in the shared Django cache."""
+        self.client.get(USER_PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        key = self.token.key
+        self.token.delete()
+        self.assertIsNone(get_token_cache().get(key))
+
+
+class LocalTokenCacheTests(TestCase):
+    """Test cases for the in-process LRU."""
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache never grows past its maximum size."""
+        cache = LocalTokenCache(max_size=2, timeout=60)
+        cache.set('a', get_user_model()(email='a@example.com'))
+        cache.set('b', get_user_model()(email='b@example.com'))
+        cache.get('a')
+        cache.set('c', get_user_model()(email='c@example.com'))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_expired_entry_dropped(self):
+        """Test entries are not served after the timeout."""
+        cache = LocalTokenCache(max_size=2, timeout=-1)
+        cache.set('a', get_user_model()(email='a@example.com'))
+
+        self.assertIsNone(cache.get('a'))
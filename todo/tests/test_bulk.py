@@ -0,0 +1,121 @@
+"""Test the bulk task endpoints."""
+import uuid
+
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+from todo.sharding import get_task_shard
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_BULK_URL = reverse('todo:task-bulk')
+
+
+class TaskBulkAPITests(TestCase):
+    """Test cases for creating, updating and deleting many tasks."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='bulk@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating a list of tasks."""
+        payload = [{'name': 'First task'}, {'name': 'Second task', 'done': True}]
+
+        res = self.client.post(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([task['name'] for task in res.data],
+                         ['First task', 'Second task'])
+        self.assertEqual(Task.objects.for_user(self.user).count(), 2)
+        self.assertTrue(Task.objects.for_user(self.user).get(
+            name='Second task').done)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test an invalid item rejects the whole batch with its error."""
+        payload = [{'name': 'Valid task'}, {'name': 'ab'}]
+
+        res = self.client.post(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(res.data[1]['name'][0].code, 'min_length')
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+
+    def test_bulk_partial_update(self):
+        """Test updating a list of tasks."""
+        first = Task.objects.create(user=self.user, name='First task')
+        second = Task.objects.create(user=self.user, name='Second task')
+        payload = [
+            {'id': str(first.id), 'done': True},
+            {'id': str(second.id), 'name': 'Renamed task'},
+        ]
+
+        res = self.client.patch(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(first.done)
+        self.assertEqual(second.name, 'Renamed task')
+        self.assertGreater(first.updated_on, first.created_on)
+
+    def test_bulk_partial_update_errors(self):
+        """Test unknown, foreign and invalid items are reported by index."""
+        task = Task.objects.create(user=self.user, name='My task')
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        foreign = Task.objects.create(user=other, name='Their task')
+        payload = [
+            {'id': str(task.id), 'name': 'xy'},
+            {'id': str(foreign.id), 'done': True},
+            {'id': str(uuid.uuid4()), 'done': True},
+            {'name': 'No id'},
+        ]
+
+        res = self.client.patch(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data[0])
+        self.assertIn('id', res.data[1])
+        self.assertIn('id', res.data[2])
+        self.assertIn('id', res.data[3])
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.done)
+
+    def test_bulk_delete(self):
+        """Test deleting a list of tasks with one statement."""
+        tasks = [Task.objects.create(user=self.user, name=f'Task {i}')
+                 for i in range(3)]
+        payload = {'ids': [str(task.id) for task in tasks[:2]]}
+
+        connection = connections[get_task_shard(self.user) or 'default']
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.delete(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        deletes = [query for query in queries.captured_queries
+                   if query['sql'].startswith('DELETE FROM "todo_task"')]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(list(Task.objects.for_user(self.user)), [tasks[2]])
+
+    def test_bulk_delete_missing_id_deletes_nothing(self):
+        """Test an unknown id is reported and no task is deleted."""
+        task = Task.objects.create(user=self.user, name='Keep me')
+        payload = {'ids': [str(task.id), str(uuid.uuid4())]}
+
+        res = self.client.delete(TASK_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(1, res.data['ids'])
+        self.assertTrue(
+            Task.objects.for_user(self.user).filter(pk=task.pk).exists())
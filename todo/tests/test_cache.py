@@ -0,0 +1,101 @@
+"""Test the versioned task response cache."""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.cache import get_task_version
+from todo.models import Task
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+def task_detail_url(task_id):
+    """return url for task detail."""
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class TaskResponseCacheTests(TestCase):
+    """Test cases for caching task responses per user version."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='cache@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, name='Cached task')
+
+    def test_repeat_list_served_from_cache(self):
+        """Test a repeated list request runs no query."""
+        self.client.get(TASK_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TASK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_write_through_api_invalidates(self):
+        """Test creating a task through the API is seen by the next list."""
+        self.client.get(TASK_URL)
+        self.client.post(TASK_URL, {'name': 'Another task'})
+
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_model_save_and_delete_invalidate(self):
+        """Test saving or deleting a task outside the API bumps the version."""
+        version = get_task_version(self.user.id)
+        self.client.get(task_detail_url(self.task.id))
+
+        self.task.name = 'Renamed task'
+        self.task.save()
+        res = self.client.get(task_detail_url(self.task.id))
+
+        self.assertEqual(res.data['name'], 'Renamed task')
+        task_id = self.task.id
+        self.task.delete()
+        self.assertGreater(get_task_version(self.user.id), version)
+        res = self.client.get(task_detail_url(task_id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profile_update_invalidates(self):
+        """Test a renamed owner is seen in the cached task responses."""
+        self.client.get(TASK_URL)
+        self.client.get(task_detail_url(self.task.id))
+
+        res = self.client.patch(reverse('todo:profile'), {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(TASK_URL)
+        self.assertEqual(res.data['results'][0]['user']['name'], 'Renamed')
+        res = self.client.get(task_detail_url(self.task.id))
+        self.assertEqual(res.data['user']['name'], 'Renamed')
+
+    def test_bulk_delete_invalidates(self):
+        """Test the bulk delete endpoint bumps the version."""
+        self.client.get(TASK_URL)
+        self.client.delete(reverse('todo:task-bulk'),
+                           {'ids': [str(self.task.id)]}, format='json')
+
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_cache_is_per_user(self):
+        """Test another user never receives a cached response."""
+        self.client.get(TASK_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual(res.data['results'], [])
@@ -0,0 +1,163 @@
+"""Test conditional requests on the task endpoints."""
+import threading
+import time
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task, TaskQuerySet
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+def task_detail_url(task_id):
+    """return url for task detail."""
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class TaskConditionalRequestTests(TestCase):
+    """Test cases for ETag and Last-Modified handling."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='etag@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, name='Tagged task')
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match returns 304 without a body."""
+        res = self.client.get(TASK_URL)
+        etag = res['ETag']
+
+        res = self.client.get(TASK_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_list_etag_changes_after_write(self):
+        """Test the list ETag changes when a task is added."""
+        etag = self.client.get(TASK_URL)['ETag']
+        Task.objects.create(user=self.user, name='Another task')
+
+        res = self.client.get(TASK_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        """Test a detail request honours If-Modified-Since."""
+        url = task_detail_url(self.task.id)
+        last_modified = self.client.get(url)['Last-Modified']
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_patch_with_stale_if_match_fails(self):
+        """Test a PATCH against an outdated ETag is refused with 412."""
+        url = task_detail_url(self.task.id)
+        etag = self.client.get(url)['ETag']
+        self.client.patch(url, {'done': True})
+
+        res = self.client.patch(url, {'name': 'Lost update'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.name, 'Tagged task')
+
+    def test_patch_and_delete_with_current_if_match(self):
+        """Test writes carrying the current ETag succeed."""
+        url = task_detail_url(self.task.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.patch(url, {'done': True}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = self.client.get(url)['ETag']
+        res = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_missing_task_still_404(self):
+        """Test conditional headers do not hide a missing task."""
+        url = task_detail_url('5b0e2a8e-7f3c-4bb0-9a57-2f6c0f0c8f11')
+
+        res = self.client.delete(url, HTTP_IF_MATCH='"abc"')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_write_locks_task_while_checking(self):
+        """Test the If-Match check reads the task with a row lock."""
+        url = task_detail_url(self.task.id)
+        etag = self.client.get(url)['ETag']
+        select_for_update = TaskQuerySet.select_for_update
+        in_atomic = []
+
+        def locked(queryset, *args, **kwargs):
+            in_atomic.append(connection.in_atomic_block)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(TaskQuerySet, 'select_for_update',
+                               autospec=True, side_effect=locked):
+            res = self.client.patch(url, {'done': True}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(in_atomic, [True])
+
+
+@unittest.skipUnless(connection.features.has_select_for_update,
+                     'The database has no row locks.')
+class ConcurrentIfMatchTests(TransactionTestCase):
+    """Test two writes carrying the same ETag against each other."""
+
+    def test_same_if_match_only_one_write_passes(self):
+        """Test the second of two racing PATCHes gets a 412."""
+        user = get_user_model().objects.create_user(
+            email='race@example.com', password='testpass123')
+        task = Task.objects.create(user=user, name='Raced task')
+        url = task_detail_url(task.id)
+        client = APIClient()
+        client.force_authenticate(user)
+        etag = client.get(url)['ETag']
+        barrier = threading.Barrier(2)
+        statuses = []
+        save = Task.save
+
+        def slow_save(*args, **kwargs):
+            # Hold the write open so the other request checks meanwhile.
+            time.sleep(0.5)
+            return save(*args, **kwargs)
+
+        def patch(name):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                res = client.patch(url, {'name': name}, HTTP_IF_MATCH=etag)
+                statuses.append(res.status_code)
+            finally:
+                connection.close()
+
+        with mock.patch.object(Task, 'save', slow_save):
+            threads = [threading.Thread(target=patch, args=(name,))
+                       for name in ('First', 'Second')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(statuses), [
+            status.HTTP_200_OK, status.HTTP_412_PRECONDITION_FAILED])
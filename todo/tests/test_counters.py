@@ -0,0 +1,246 @@
+"""Test the denormalized per-user task counters."""
+import threading
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Case, F, Value, When
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from todo.models import Task, User
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+STATS_URL = reverse('todo:stats')
+PROFILE_URL = reverse('todo:profile')
+
+
+def create_task(user, **params):
+    defaults = {'name': 'Sample task'}
+    defaults.update(params)
+    return Task.objects.create(user=user, **defaults)
+
+
+class TaskCounterTests(TestCase):
+    """Test the counters follow every way of writing tasks."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='counter@example.com', password='testpass123')
+
+    def assertCounts(self, total, done):
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.task_count, self.user.done_task_count),
+                         (total, done))
+
+    def test_create_toggle_and_delete(self):
+        """Test saving and deleting single tasks."""
+        task = create_task(self.user)
+        create_task(self.user, done=True)
+        self.assertCounts(2, 1)
+
+        task.done = True
+        task.save()
+        self.assertCounts(2, 2)
+
+        task.delete()
+        self.assertCounts(1, 1)
+
+    def test_stale_instances_toggle_once(self):
+        """Test two stale copies marking a task done count it once."""
+        create_task(self.user)
+        first = Task.objects.for_user(self.user).get()
+        second = Task.objects.for_user(self.user).get()
+
+        first.done = True
+        first.save()
+        second.done = True
+        second.save()
+
+        self.assertCounts(1, 1)
+
+    def test_deleting_twice_decrements_once(self):
+        """Test deleting a task from two copies counts it once."""
+        create_task(self.user, done=True)
+        first = Task.objects.for_user(self.user).get()
+        second = Task.objects.for_user(self.user).get()
+
+        first.delete()
+        second.delete()
+
+        self.assertCounts(0, 0)
+
+    def test_deleting_stale_copy(self):
+        """Test deleting a stale copy counts the stored `done`."""
+        create_task(self.user)
+        stale = Task.objects.for_user(self.user).get()
+
+        current = Task.objects.for_user(self.user).get()
+        current.done = True
+        current.save()
+        stale.delete()
+
+        self.assertCounts(0, 0)
+
+    def test_queryset_writes(self):
+        """Test bulk_create, update, bulk_update and delete."""
+        tasks = Task.objects.bulk_create([
+            Task(user=self.user, name=f'Task {index}', done=index % 2 == 0)
+            for index in range(4)
+        ])
+        self.assertCounts(4, 2)
+
+        Task.objects.for_user(self.user).update(done=True)
+        self.assertCounts(4, 4)
+
+        for task in tasks:
+            task.done = task is tasks[-1]
+        Task.objects.bulk_update(tasks, ['done'])
+        self.assertCounts(4, 1)
+
+        Task.objects.for_user(self.user).filter(
+            pk__in=[tasks[0].pk, tasks[3].pk]).delete()
+        self.assertCounts(2, 0)
+
+    def test_update_with_expression(self):
+        """Test update() counts the tasks an expression flips."""
+        Task.objects.bulk_create([
+            Task(user=self.user, name=f'Task {index}', done=index == 0)
+            for index in range(3)
+        ])
+        self.assertCounts(3, 1)
+
+        Task.objects.for_user(self.user).update(done=~F('done'))
+        self.assertCounts(3, 2)
+
+        Task.objects.for_user(self.user).filter(name='Task 1').update(
+            done=Case(When(done=True, then=Value(False)),
+                      default=Value(True)))
+        self.assertCounts(3, 1)
+
+    def test_reconcile_command(self):
+        """Test the command fixes drifted counters."""
+        create_task(self.user, done=True)
+        User.objects.filter(pk=self.user.pk).update(task_count=7,
+                                                    done_task_count=0)
+
+        out = StringIO()
+        call_command('reconcile_task_counters', stdout=out)
+
+        self.assertCounts(1, 1)
+        self.assertIn('1 users', out.getvalue())
+
+
+class UserTaskStatsAPITests(TestCase):
+    """Test the task stats endpoint."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='stats@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_stats_requires_authentication(self):
+        """Test authentication is required for the stats."""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_retrieve_stats(self):
+        """Test the stats are read from the counters in one query."""
+        create_task(self.user)
+        create_task(self.user, done=True)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'total': 2, 'open': 1, 'done': 1})
+
+    def test_profile_update_keeps_counters(self):
+        """Test a profile PATCH does not write back stale counters."""
+        for _ in range(3):
+            create_task(self.user)
+
+        res = self.client.patch(PROFILE_URL, {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data, {'total': 3, 'open': 3, 'done': 0})
+
+
+@unittest.skipIf(
+    connection.vendor == 'sqlite'
+    and connection.creation.is_in_memory_db(
+        connection.creation._get_test_db_name()),
+    'In-memory SQLite locks tables instead of waiting for writers.')
+class ConcurrentTaskCounterTests(TransactionTestCase):
+    """Test the counters under writes from several threads at once."""
+    databases = '__all__'
+    threads = 8
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='concurrent@example.com', password='testpass123')
+        self.task = create_task(self.user)
+
+    def run_threads(self, target):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def run(index):
+            try:
+                barrier.wait()
+                target(index)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(index,))
+                   for index in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertCountsMatchTasks(self):
+        self.user.refresh_from_db()
+        tasks = Task.objects.for_user(self.user)
+        self.assertEqual(
+            (self.user.task_count, self.user.done_task_count),
+            (tasks.count(), tasks.filter(done=True).count()))
+
+    def test_concurrent_creates_toggles_and_deletes(self):
+        """Test concurrent writes leave counters matching the tasks."""
+        def write(index):
+            task = create_task(self.user, done=index % 2 == 0)
+            # Every thread toggles the shared task from its own copy.
+            shared = Task.objects.for_user(self.user).get(pk=self.task.pk)
+            shared.done = True
+            shared.save()
+            if index % 4 == 0:
+                task.delete()
+
+        self.run_threads(write)
+
+        self.assertCountsMatchTasks()
+        self.assertEqual(self.user.task_count, 1 + self.threads * 3 // 4)
+
+    def test_concurrent_deletes_of_one_task(self):
+        """Test deleting the same task from every thread counts once."""
+        copies = [Task.objects.for_user(self.user).get(pk=self.task.pk)
+                  for _ in range(self.threads)]
+
+        self.run_threads(lambda index: copies[index].delete())
+
+        self.assertCountsMatchTasks()
+        self.assertEqual(self.user.task_count, 0)
@@ -0,0 +1,123 @@
+"""Test the background deletion of user accounts."""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import models
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from todo.deletion import claim_account_deletion, schedule_account_deletion
+from todo.models import (AccountDeletion, ArchivedTask, Task, TaskTombstone,
+                         User)
+from todo.sharding import get_task_shard
+
+
+USER_PROFILE_URL = reverse('todo:profile')
+
+
+def run_worker(**options):
+    out = StringIO()
+    call_command('delete_accounts', once=True, stdout=out, **options)
+    return out.getvalue()
+
+
+class AccountDeletionTests(TestCase):
+    """Test cases for deleting accounts through the job queue."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='leaving@example.com', password='testpass123')
+        self.other = get_user_model().objects.create_user(
+            email='staying@example.com', password='testpass123')
+        for user in (self.user, self.other):
+            Task.objects.bulk_create(
+                [Task(user=user, name=f'Task {index}') for index in range(5)])
+            Task.objects.for_user(user)[:1].get().delete()
+        task = Task.objects.for_user(self.user).first()
+        ArchivedTask.objects.create(
+            id=task.id, name=task.name, created_on=task.created_on,
+            updated_on=task.updated_on, user=self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    def test_delete_profile_schedules_deletion(self):
+        """Test DELETE deactivates the user and queues the job."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        client.get(USER_PROFILE_URL)
+
+        res = client.delete(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertTrue(AccountDeletion.objects.filter(user=self.user).exists())
+        self.assertEqual(Task.objects.for_user(self.user).count(), 4)
+        # The token cached by the first request no longer works.
+        res = client.get(USER_PROFILE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_worker_deletes_in_batches(self):
+        """Test the worker deletes the user and only their rows."""
+        schedule_account_deletion(self.user)
+
+        out = run_worker(batch_size=2)
+
+        self.assertIn(f'Deleted user {self.user.pk} and 6 of their rows.',
+                      out)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(AccountDeletion.objects.exists())
+        for model in (Task, ArchivedTask, TaskTombstone):
+            self.assertFalse(model.objects.using(get_task_shard(
+                self.user)).filter(user=self.user).exists())
+        self.assertEqual(Task.objects.for_user(self.other).count(), 4)
+        self.assertEqual(
+            TaskTombstone.objects.using(get_task_shard(self.other)).filter(
+                user=self.other).count(), 1)
+
+    def test_scheduling_twice(self):
+        """Test a second request reuses the queued job."""
+        first = schedule_account_deletion(self.user)
+
+        self.assertEqual(schedule_account_deletion(self.user), first)
+
+    def test_leases(self):
+        """Test a held job is skipped and an expired lease is retaken."""
+        schedule_account_deletion(self.user)
+        job = claim_account_deletion(lease=300)
+
+        self.assertIsNone(claim_account_deletion(lease=300))
+        run_worker()
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+        AccountDeletion.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        run_worker()
+
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_resume_after_partial_run(self):
+        """Test a job interrupted halfway finishes when run again."""
+        schedule_account_deletion(self.user)
+        job = claim_account_deletion(lease=0)
+        # The worker died after deleting its first batch.
+        pks = list(Task.objects.for_user(self.user).values_list(
+            'pk', flat=True)[:2])
+        models.QuerySet(Task).using(get_task_shard(self.user)).filter(
+            pk__in=pks).delete()
+
+        out = run_worker()
+
+        self.assertIn(f'Deleted user {self.user.pk} and 4 of their rows.',
+                      out)
+        self.assertFalse(AccountDeletion.objects.filter(pk=job.pk).exists())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Task.objects.for_user(self.user).exists())
@@ -0,0 +1,270 @@
+"""Test the Server-Sent Events of task changes."""
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from todo.authentication import get_token_cache
+from todo.events import (LocalBroker, TaskEvent, _publish, get_broker,
+                         task_event_data)
+from todo.models import Task
+from todo.sharding import get_task_shard
+
+
+EVENTS_URL = reverse('todo:task-events')
+TASK_EVENTS = {'BACKEND': 'local', 'HISTORY': 3, 'KEEPALIVE': 15}
+
+
+def make_events(*ids):
+    return [TaskEvent(event_id, 'deleted', {'id': str(event_id)})
+            for event_id in ids]
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """Test cases for the in-process broker."""
+
+    def setUp(self):
+        self.broker = LocalBroker(history=3, max_users=2, queue_size=2)
+
+    async def test_fan_out(self):
+        """Test events reach the streams of their user only."""
+        first, _ = self.broker.subscribe(1)
+        second, _ = self.broker.subscribe(1)
+        other, _ = self.broker.subscribe(2)
+
+        self.broker.publish(1, make_events(1))
+
+        self.assertEqual(await first.get(), make_events(1)[0])
+        self.assertEqual(await second.get(), make_events(1)[0])
+        await asyncio.sleep(0)
+        self.assertTrue(other.queue.empty())
+
+    async def test_replay(self):
+        """Test the events after the last id are replayed."""
+        self.broker.publish(1, make_events(5, 6, 7))
+
+        _, replay = self.broker.subscribe(1, last_event_id=5,
+                                          latest_event_id=7)
+        self.assertEqual(replay, make_events(6, 7))
+        _, replay = self.broker.subscribe(1, last_event_id=7,
+                                          latest_event_id=7)
+        self.assertEqual(replay, [])
+
+    async def test_replay_gap(self):
+        """Test a resync is asked for when events were dropped."""
+        self.broker.publish(1, make_events(5, 6, 7, 8))
+
+        _, replay = self.broker.subscribe(1, last_event_id=4)
+        self.assertIsNone(replay)
+        _, replay = self.broker.subscribe(2, last_event_id=4,
+                                          latest_event_id=9)
+        self.assertIsNone(replay)
+
+    async def test_slow_stream_overflows(self):
+        """Test a full queue marks the stream instead of growing."""
+        subscription, _ = self.broker.subscribe(1)
+
+        self.broker.publish(1, make_events(1, 2, 3))
+        await asyncio.sleep(0)
+
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(subscription.queue.qsize(), 2)
+        subscription.clear()
+        self.assertFalse(subscription.overflowed)
+
+    async def test_unsubscribe(self):
+        """Test closed streams get no more events."""
+        subscription, _ = self.broker.subscribe(1)
+        self.broker.unsubscribe(subscription)
+
+        self.broker.publish(1, make_events(1))
+        await asyncio.sleep(0)
+
+        self.assertTrue(subscription.queue.empty())
+
+    @override_settings(TASK_EVENTS={'BACKEND': 'postgres'})
+    def test_postgres_needs_shared_cache(self):
+        """Test event ids are not counted in a per-process cache."""
+        with self.assertRaisesMessage(ImproperlyConfigured, 'REDIS_URL'):
+            get_broker()
+
+
+class TaskEventPublishingTests(TestCase):
+    """Test task writes publish events once committed."""
+    databases = '__all__'
+
+    def setUp(self):
+        # A fresh broker for every test.
+        self.enterContext(override_settings(TASK_EVENTS=TASK_EVENTS))
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='events@example.com', password='testpass123')
+        # Events are published when the user's shard commits.
+        self.using = get_task_shard(self.user) or 'default'
+
+    def published(self):
+        history = get_broker()._history.get(self.user.pk, [])
+        return [(event.kind, event.data.get('name')) for event in history]
+
+    def test_writes_publish_events(self):
+        """Test creating, updating and deleting tasks."""
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            task = Task.objects.create(user=self.user, name='First')
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            task.name = 'Renamed'
+            task.save()
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            task.delete()
+
+        self.assertEqual(self.published(), [('created', 'First'),
+                                             ('updated', 'Renamed'),
+                                             ('deleted', None)])
+        ids = [event.id for event in get_broker()._history[self.user.pk]]
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 3)))
+
+    def test_bulk_writes_publish_events(self):
+        """Test the queryset write paths."""
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            Task.objects.bulk_create([Task(user=self.user, name='Bulk')])
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            Task.objects.for_user(self.user).update(done=True)
+
+        self.assertEqual(self.published(), [('created', 'Bulk'),
+                                             ('updated', 'Bulk')])
+        self.assertTrue(
+            get_broker()._history[self.user.pk][-1].data['done'])
+
+    def test_large_update_publishes_reset(self):
+        """Test updating more tasks than the history keeps sends a reset."""
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            Task.objects.bulk_create([Task(user=self.user, name='Bulk')
+                                      for _ in range(4)])
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            Task.objects.for_user(self.user).update(done=True)
+
+        self.assertEqual(self.published(), [('created', 'Bulk')] * 2
+                         + [('reset', None)])
+
+    def test_bulk_update_publishes_stored_updated_on(self):
+        """Test bulk_update stamps updated_on as it publishes it."""
+        task = Task.objects.create(user=self.user, name='Bulk')
+        task.name = 'Renamed'
+        with self.captureOnCommitCallbacks(using=self.using, execute=True):
+            Task.objects.bulk_update([task], ['name'])
+
+        self.assertEqual(self.published(), [('updated', 'Renamed')])
+        task.refresh_from_db()
+        event = get_broker()._history[self.user.pk][-1]
+        self.assertEqual(event.data['updated_on'],
+                         task_event_data(task)['updated_on'])
+        self.assertGreater(task.updated_on, task.created_on)
+
+    def test_rollback_publishes_nothing(self):
+        """Test no event is sent for a write that never commits."""
+        with self.captureOnCommitCallbacks(using=self.using, execute=False):
+            Task.objects.create(user=self.user, name='Rolled back')
+
+        self.assertEqual(self.published(), [])
+
+
+class TaskEventsViewTests(TestCase):
+    """Test cases for the event stream endpoint."""
+
+    def setUp(self):
+        self.enterContext(override_settings(TASK_EVENTS=TASK_EVENTS))
+        cache.clear()
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='events@example.com', password='testpass123')
+        token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {token.key}',
+                        'Accept': 'text/event-stream'}
+
+    async def open_stream(self, **headers):
+        res = await self.async_client.get(
+            EVENTS_URL, headers={**self.headers, **headers})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        stream = aiter(res.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        return stream
+
+    async def read(self, stream):
+        return await asyncio.wait_for(anext(stream), 1)
+
+    async def test_streams_events(self):
+        """Test published events are pushed to the open stream."""
+        stream = await self.open_stream()
+        await asyncio.sleep(0)
+
+        _publish([(self.user.pk, 'deleted', {'id': 'abc'})])
+
+        message = await self.read(stream)
+        await stream.aclose()
+        self.assertRegex(message.decode(),
+                         r'^id: \d+\nevent: deleted\ndata: {"id":"abc"}\n\n$')
+
+    async def test_resume_from_last_event_id(self):
+        """Test a reconnecting client gets the events it missed."""
+        _publish([(self.user.pk, 'deleted', {'id': 'one'}),
+                  (self.user.pk, 'deleted', {'id': 'two'})])
+        first_id = get_broker()._history[self.user.pk][0].id
+
+        stream = await self.open_stream(**{'Last-Event-ID': str(first_id)})
+
+        message = await self.read(stream)
+        await stream.aclose()
+        self.assertIn(f'id: {first_id + 1}\n', message.decode())
+        self.assertIn('"two"', message.decode())
+
+    async def test_reset_when_history_lost(self):
+        """Test a client too far behind is told to resync."""
+        _publish([(self.user.pk, 'deleted', {'id': str(index)})
+                  for index in range(5)])
+        first_id = get_broker()._history[self.user.pk][0].id
+
+        stream = await self.open_stream(
+            **{'Last-Event-ID': str(first_id - 2)})
+
+        self.assertEqual(await self.read(stream),
+                         b'event: reset\ndata: {}\n\n')
+        await stream.aclose()
+
+    async def test_keepalive(self):
+        """Test idle streams send comments."""
+        with override_settings(TASK_EVENTS={**TASK_EVENTS,
+                                            'KEEPALIVE': 0.01}):
+            stream = await self.open_stream()
+
+            self.assertEqual(await self.read(stream), b': keepalive\n\n')
+            await stream.aclose()
+        self.assertEqual(get_broker()._subscriptions, {})
+
+    async def test_requires_authentication(self):
+        """Test anonymous clients get an error event."""
+        res = await self.async_client.get(
+            EVENTS_URL, headers={'Accept': 'text/event-stream'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(res.content.startswith(b'event: error\ndata: '))
+
+    def test_refused_under_wsgi(self):
+        """Test the stream is not served by a sync worker."""
+        res = self.client.get(EVENTS_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(res.streaming)
+
+    async def test_invalid_last_event_id(self):
+        """Test a malformed Last-Event-ID is rejected."""
+        res = await self.async_client.get(
+            EVENTS_URL, headers={'Authorization': self.headers['Authorization'],
+                                 'Last-Event-ID': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,89 @@
+"""Test the streaming task export."""
+import json
+from unittest import mock
+
+import msgpack
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+from todo.views import TaskViewSet
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+EXPORT_URL = reverse('todo:task-export')
+
+
+class TaskExportAPITests(TestCase):
+    """Test cases for exporting tasks."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='export@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, name=f'Task {i}')
+                      for i in range(5)]
+        patcher = mock.patch.object(TaskViewSet, 'export_chunk_size', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_export_json_array(self):
+        """Test the default export is a streamed JSON array."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertFalse(res.is_async)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        data = json.loads(b''.join(res.streaming_content))
+        self.assertEqual([task['id'] for task in data],
+                         [str(task.id) for task in self.tasks])
+
+    async def test_export_under_asgi(self):
+        """Test the export streams from an async iterator under ASGI."""
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(
+            EXPORT_URL, headers={'Authorization': f'Token {token.key}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        chunks = [chunk async for chunk in res.streaming_content]
+        # The opening bracket, a chunk per two tasks and the closing one.
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual([task['id'] for task in json.loads(b''.join(chunks))],
+                         [str(task.id) for task in self.tasks])
+
+    def test_export_ndjson(self):
+        """Test exporting one task per line."""
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines],
+                         [task.name for task in self.tasks])
+
+    def test_export_msgpack(self):
+        """Test exporting a sequence of MessagePack objects."""
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(b''.join(res.streaming_content))
+        self.assertEqual([task['name'] for task in unpacker],
+                         [task.name for task in self.tasks])
+
+    def test_export_empty(self):
+        """Test exporting an account without tasks."""
+        Task.objects.for_user(self.user).delete()
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(b''.join(res.streaming_content), b'[]')
@@ -0,0 +1,80 @@
+"""Test the fast read path renders tasks like TaskSerializer."""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+from todo.serializers import (FastTaskSerializer, TaskSerializer,
+                              TaskUserIdSerializer)
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+def detail_url(task_id):
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class FastTaskSerializerTests(TestCase):
+    """Test cases for FastTaskSerializer."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='fast@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        for index in range(3):
+            Task.objects.create(user=self.user, name=f'Task {index}',
+                                done=index == 1)
+
+    def assertSameBytes(self, serializer_class, **params):
+        res = self.client.get(TASK_URL, params)
+        tasks = Task.objects.for_user(self.user).order_by(
+            '-created_on', '-id')
+        expected = JSONRenderer().render({
+            'next': None,
+            'previous': None,
+            'results': serializer_class(tasks, many=True).data,
+        })
+
+        self.assertEqual(res.content, expected)
+
+    def test_list_matches_task_serializer(self):
+        """Test the list is rendered byte for byte like TaskSerializer."""
+        self.assertSameBytes(TaskSerializer)
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_list_matches_in_utc(self):
+        """Test UTC datetimes keep the `Z` suffix."""
+        self.assertSameBytes(TaskSerializer)
+
+    def test_list_matches_user_id_serializer(self):
+        """Test the owner id representation matches too."""
+        self.assertSameBytes(TaskUserIdSerializer, user_repr='id')
+
+    def test_retrieve_matches_task_serializer(self):
+        """Test a single task is rendered like TaskSerializer."""
+        task = Task.objects.for_user(self.user).first()
+
+        res = self.client.get(detail_url(task.id))
+
+        self.assertEqual(res.content,
+                         JSONRenderer().render(TaskSerializer(task).data))
+
+    def test_unsupported_field_falls_back(self):
+        """Test serializers with other fields use the regular path."""
+        class NamedTaskSerializer(TaskSerializer):
+            label = serializers.SerializerMethodField()
+
+            def get_label(self, obj):
+                return obj.name.upper()
+
+        self.assertIsNone(
+            FastTaskSerializer.build(NamedTaskSerializer(), self.user))
+        self.assertIsNotNone(
+            FastTaskSerializer.build(TaskSerializer(), self.user))
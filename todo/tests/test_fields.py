@@ -0,0 +1,90 @@
+"""Test selecting the task fields returned with `?fields=`."""
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+from todo.sharding import get_task_shard
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+def detail_url(task_id):
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class SparseFieldsetTests(TestCase):
+    """Test cases for sparse fieldsets."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='fields@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.tasks = [
+            Task.objects.create(user=self.user, name=f'Task {index}')
+            for index in range(3)
+        ]
+
+    def test_list_only_returns_requested_fields(self):
+        """Test the list is trimmed to the requested fields."""
+        res = self.client.get(TASK_URL, {'fields': 'id,name,done'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for item in res.data['results']:
+            self.assertEqual(set(item), {'id', 'name', 'done'})
+
+    def test_list_selects_only_needed_columns(self):
+        """Test unused columns are not read from the database."""
+        connection = connections[get_task_shard(self.user) or 'default']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TASK_URL, {'fields': 'id,done'})
+
+        select = next(query['sql'] for query in queries.captured_queries
+                      if 'FROM "todo_task"' in query['sql']
+                      and 'ORDER BY' in query['sql'])
+        self.assertNotIn('"todo_task"."name"', select)
+        self.assertNotIn('"todo_task"."updated_on"', select)
+
+    def test_pagination_with_fields(self):
+        """Test the pagination still works without the ordering fields."""
+        res = self.client.get(TASK_URL, {'fields': 'id', 'page_size': 2})
+        next_res = self.client.get(res.data['next'])
+
+        ids = [item['id'] for item in
+               res.data['results'] + next_res.data['results']]
+        self.assertEqual(ids, [str(task.id) for task in reversed(self.tasks)])
+
+    def test_retrieve_with_fields(self):
+        """Test a single task is trimmed to the requested fields."""
+        res = self.client.get(detail_url(self.tasks[0].id),
+                              {'fields': 'name,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Task 0')
+        self.assertEqual(res.data['user']['email'], self.user.email)
+        self.assertEqual(set(res.data), {'name', 'user'})
+
+    def test_fields_change_the_etag(self):
+        """Test each fieldset of a task has its own ETag."""
+        url = detail_url(self.tasks[0].id)
+        full = self.client.get(url)
+
+        res = self.client.get(url, {'fields': 'id'},
+                              HTTP_IF_NONE_MATCH=full['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unknown_field_rejected(self):
+        """Test asking for an unknown field returns a 400."""
+        res = self.client.get(TASK_URL, {'fields': 'id,colour'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('colour', str(res.data['fields'][0]))
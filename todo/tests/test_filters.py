@@ -0,0 +1,82 @@
+"""Test filtering and ordering the task list."""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from todo.models import Task
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+class TaskFilterTests(TestCase):
+    """Test cases for the task list filters."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='filter@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now()
+        self.old_open = self.create('Old open', False, days=10)
+        self.old_done = self.create('Old done', True, days=5)
+        self.new_open = self.create('New open', False, days=1)
+
+    def create(self, name, done, days):
+        task = Task.objects.create(user=self.user, name=name, done=done)
+        Task.objects.for_user(self.user).filter(pk=task.pk).update(
+            created_on=self.now - timedelta(days=days),
+            updated_on=self.now - timedelta(days=11 - days))
+        return task
+
+    def names(self, **params):
+        res = self.client.get(TASK_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [task['name'] for task in res.data['results']]
+
+    def test_open_tasks_newest_first(self):
+        """Test `done=false` returns open tasks, newest first."""
+        self.assertEqual(self.names(done='false'), ['New open', 'Old open'])
+
+    def test_done_tasks(self):
+        """Test `done=true` returns completed tasks."""
+        self.assertEqual(self.names(done='true'), ['Old done'])
+
+    def test_created_range(self):
+        """Test filtering on a created_on range."""
+        names = self.names(
+            created_after=(self.now - timedelta(days=7)).isoformat(),
+            created_before=(self.now - timedelta(days=2)).isoformat(),
+        )
+
+        self.assertEqual(names, ['Old done'])
+
+    def test_updated_after(self):
+        """Test filtering on updated_on."""
+        names = self.names(
+            updated_after=(self.now - timedelta(days=3)).isoformat())
+
+        self.assertEqual(names, ['Old open'])
+
+    def test_ordering_by_updated(self):
+        """Test selecting the ordering, with pagination following it."""
+        first = self.client.get(TASK_URL, {'ordering': 'updated_on',
+                                           'page_size': 2}).data
+        second = self.client.get(first['next']).data
+
+        names = [task['name'] for task in first['results'] + second['results']]
+        self.assertEqual(names, ['New open', 'Old done', 'Old open'])
+
+    def test_invalid_parameters(self):
+        """Test invalid filter values are rejected with 400."""
+        for params in ({'done': 'maybe'}, {'created_after': 'yesterday'},
+                       {'ordering': 'name'}):
+            res = self.client.get(TASK_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,249 @@
+"""Test the Idempotency-Key handling of the write endpoints."""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from todo.authentication import get_token_cache
+from todo.idempotency import get_fingerprint
+from todo.models import IdempotencyKey, Task
+
+
+TASK_URL = reverse('todo:task-list')
+ASYNC_TASK_URL = reverse('todo:async-task-list')
+REGISTER_URL = reverse('todo:register')
+BODY = '{"name": "Pay rent"}'
+
+
+def detail_url(task_id):
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class IdempotencyKeyTests(TestCase):
+    """Test cases for replaying writes sent with an Idempotency-Key."""
+    databases = '__all__'
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='retry@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_task(self, key, body=BODY, client=None):
+        return (client or self.client).post(
+            TASK_URL, body, content_type='application/json',
+            headers={'Idempotency-Key': key})
+
+    def hold_key(self, key, **fields):
+        """Claim `key` as an in-flight POST of `BODY` would."""
+        request = RequestFactory().post(TASK_URL, BODY,
+                                        content_type='application/json')
+        return IdempotencyKey.objects.create(
+            user=self.user, key=key, request_hash=get_fingerprint(request),
+            **fields)
+
+    def test_retry_replays_response(self):
+        """Test a retry gets the first response without a second write."""
+        res1 = self.post_task('key-1')
+        res2 = self.post_task('key-1')
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.json(), res1.json())
+        self.assertEqual(res2['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', res1)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 1)
+
+    def test_other_keys_write_again(self):
+        """Test requests without a key or with another key all run."""
+        self.post_task('key-1')
+        self.post_task('key-2')
+        self.client.post(TASK_URL, BODY, content_type='application/json')
+
+        self.assertEqual(Task.objects.for_user(self.user).count(), 3)
+
+    def test_keys_are_per_user(self):
+        """Test another user's key does not replay this user's response."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.post_task('key-1')
+
+        res = self.post_task('key-1', client=client)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Task.objects.for_user(other).count(), 1)
+
+    def test_key_reused_with_other_request(self):
+        """Test a key sent with a different body is rejected."""
+        self.post_task('key-1')
+
+        res = self.post_task('key-1', body='{"name": "Pay bills"}')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 1)
+
+    def test_failed_request_releases_key(self):
+        """Test an error response is not stored and the retry runs."""
+        res1 = self.post_task('key-1', body='{"name": ""}')
+        res2 = self.post_task('key-1')
+
+        self.assertEqual(res1.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res2)
+
+    def test_invalid_key(self):
+        """Test an overlong key is rejected."""
+        res = self.post_task('k' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+
+    def test_partial_update_replays_response(self):
+        """Test a retried PATCH is not applied again."""
+        task = Task.objects.create(user=self.user, name='Old name')
+        headers = {'Idempotency-Key': 'key-1'}
+        res1 = self.client.patch(detail_url(task.id), {'name': 'New name'},
+                                 format='json', headers=headers)
+        Task.objects.for_user(self.user).filter(pk=task.pk).update(
+            name='Changed since')
+
+        res2 = self.client.patch(detail_url(task.id), {'name': 'New name'},
+                                 format='json', headers=headers)
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res2.json(), res1.json())
+        task.refresh_from_db()
+        self.assertEqual(task.name, 'Changed since')
+
+    @override_settings(IDEMPOTENCY_KEY_WAIT=0)
+    def test_request_in_flight(self):
+        """Test a retry of a request still running gets a 409."""
+        self.hold_key('key-1',
+                      locked_until=timezone.now() + timedelta(minutes=1))
+
+        res = self.post_task('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('Retry-After', res)
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+
+    def test_waits_for_request_in_flight(self):
+        """Test a retry waits for the running request and replays it."""
+        record = self.hold_key(
+            'key-1', locked_until=timezone.now() + timedelta(minutes=1))
+
+        def finish(seconds):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                locked_until=None, status_code=201, response={'id': 'x'})
+
+        with mock.patch('todo.idempotency.time.sleep',
+                        side_effect=finish) as sleep:
+            res = self.post_task('key-1')
+
+        sleep.assert_called_once()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json(), {'id': 'x'})
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+
+    def test_expired_lease_is_taken_over(self):
+        """Test the key of a request that died is claimed by the retry."""
+        self.hold_key('key-1',
+                      locked_until=timezone.now() - timedelta(seconds=1))
+
+        res = self.post_task('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 1)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(record.locked_until)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_expired_key_runs_again(self):
+        """Test a key past its TTL is free to use again."""
+        self.post_task('key-1')
+        IdempotencyKey.objects.update(
+            created_on=timezone.now() - timedelta(minutes=2))
+
+        res = self.post_task('key-1', body='{"name": "Pay bills"}')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Task.objects.for_user(self.user).count(), 2)
+
+    def test_register_replays_response(self):
+        """Test a retried registration creates a single user."""
+        client = APIClient()
+        payload = {'email': 'new@example.com', 'password': 'testpass123',
+                   'name': 'New'}
+        headers = {'Idempotency-Key': 'signup-1'}
+        res1 = client.post(REGISTER_URL, payload, format='json',
+                           headers=headers)
+        res2 = client.post(REGISTER_URL, payload, format='json',
+                           headers=headers)
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.json(), res1.json())
+        self.assertEqual(
+            get_user_model().objects.filter(email='new@example.com').count(),
+            1)
+        self.assertIsNone(IdempotencyKey.objects.get().user)
+
+    def test_prune_idempotency_keys(self):
+        """Test the prune command deletes the expired keys only."""
+        self.post_task('old')
+        IdempotencyKey.objects.update(
+            created_on=timezone.now() - timedelta(days=2))
+        self.post_task('new')
+        out = StringIO()
+
+        call_command('prune_idempotency_keys', stdout=out)
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list('key', flat=True)),
+            ['new'])
+        self.assertIn('Deleted 1 idempotency keys.', out.getvalue())
+
+
+class AsyncIdempotencyKeyTests(TestCase):
+    """Test cases for Idempotency-Key on the async views."""
+    databases = '__all__'
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='async-retry@example.com', password='testpass123')
+        token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {token.key}',
+                        'Idempotency-Key': 'key-1'}
+
+    async def test_retry_replays_response(self):
+        """Test a retried async create writes once."""
+        res1 = await self.async_client.post(
+            ASYNC_TASK_URL, BODY, content_type='application/json',
+            headers=self.headers)
+        res2 = await self.async_client.post(
+            ASYNC_TASK_URL, BODY, content_type='application/json',
+            headers=self.headers)
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.json(), res1.json())
+        self.assertEqual(res2['Idempotent-Replayed'], 'true')
+        self.assertEqual(await Task.objects.for_user(self.user).acount(),
+                         1)
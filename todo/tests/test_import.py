@@ -0,0 +1,118 @@
+"""Test importing tasks from files."""
+import csv
+import json
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+IMPORT_URL = reverse('todo:task-import-tasks')
+
+
+class TaskImportAPITests(TestCase):
+    """Test cases for the task import endpoint."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='import@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content, **data):
+        data['file'] = SimpleUploadedFile(name, content)
+        return self.client.post(IMPORT_URL, data, format='multipart')
+
+    def test_import_ndjson_in_batches(self):
+        """Test valid NDJSON rows are created across several batches."""
+        content = b''.join(
+            json.dumps({'name': f'Task {i}', 'done': i % 2 == 0}).encode()
+            + b'\n' for i in range(5)
+        )
+
+        res = self.upload('tasks.ndjson', content, batch_size=2)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'created': 5, 'failed': 0, 'errors': []})
+        self.assertEqual(Task.objects.for_user(self.user).count(), 5)
+        self.assertEqual(Task.objects.for_user(self.user).filter(
+            done=True).count(), 3)
+
+    def test_import_csv_reports_errors_by_line(self):
+        """Test invalid CSV rows are skipped and reported with their line."""
+        content = b'name,done\nGood task,true\nab,false\nAnother task,false\n'
+
+        res = self.upload('tasks.csv', content)
+
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 1)
+        self.assertEqual(res.data['errors'][0]['line'], 3)
+        self.assertIn('name', res.data['errors'][0]['errors'])
+
+    def test_import_csv_unparsable_row(self):
+        """Test a CSV row the reader rejects is reported, not a 500."""
+        too_long = b'x' * (csv.field_size_limit() + 1)
+        content = (b'name,done\nGood task,true\n' + too_long
+                   + b',false\nAnother task,false\n')
+
+        res = self.upload('tasks.csv', content, batch_size=1)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['errors'], [
+            {'line': 3, 'errors': {'non_field_errors': ['Invalid row.']}}])
+
+    def test_import_bad_json_line(self):
+        """Test a line that is not a JSON object is reported."""
+        res = self.upload('tasks.ndjson', b'{"name": "Fine task"}\n[1, 2]\n')
+
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['errors'][0]['line'], 2)
+
+    def test_invalid_utf8_rejected(self):
+        """Test a file that is not UTF-8 is rejected before any import."""
+        for name in ('tasks.csv', 'tasks.ndjson'):
+            content = (b'name\n' if name.endswith('.csv') else b'') + b''.join(
+                b'{"name": "Task %d"}\n' % i if name.endswith('.ndjson')
+                else b'Task %d\n' % i for i in range(5)) + b'\xff\xfe bad\n'
+            with self.subTest(name=name):
+                res = self.upload(name, content, batch_size=2)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('file', res.data)
+        self.assertFalse(Task.objects.for_user(self.user).exists())
+
+    def test_unknown_format_rejected(self):
+        """Test an upload without a recognisable format is rejected."""
+        res = self.upload('tasks.txt', b'name\nTask\n')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportTasksCommandTests(TestCase):
+    """Test cases for the import_tasks command."""
+    databases = '__all__'
+
+    def test_import_from_file(self):
+        """Test the command imports a CSV file for a user."""
+        user = get_user_model().objects.create_user(
+            email='cli@example.com', password='testpass123')
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write(b'name\nFirst task\nSecond task\n')
+            csv_file.flush()
+            out = StringIO()
+
+            call_command('import_tasks', user.email, csv_file.name, stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['created'], 2)
+        self.assertEqual(Task.objects.for_user(user).count(), 2)
@@ -2,7 +2,8 @@
     Test for models.
 """
 from django.test import TestCase
-from todo.models import Task
+from todo.models import ArchivedTask, Task, TaskTombstone
+from todo.sharding import get_task_shard
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 
@@ -73,12 +74,13 @@ class UserModelTests(TestCase):
         
 class TaskModelTests(TestCase):
     """Test for Task Model."""
+    databases = '__all__'
     def test_task_create_success(self):
         """Test create task success."""
         user = create_user()
         new_task = create_task(user=user)
         
-        task = Task.objects.get(id=new_task.id)
+        task = Task.objects.for_user(user).get(id=new_task.id)
         
         self.assertEqual(task.name, new_task.name)
         self.assertEqual(task.user.name, new_task.user.name)
@@ -116,6 +118,17 @@ class TaskModelTests(TestCase):
             
         self.assertEqual(context.exception.message_dict['user'][0],
                          'This field cannot be null.')
-        
-        
-    
\ No newline at end of file
+
+    def test_deleting_user_deletes_tasks(self):
+        """Test deleting a user deletes their rows on their shard."""
+        user = create_user()
+        shard = get_task_shard(user)
+        create_task(user=user)
+        create_task(user=user).delete()
+        ArchivedTask.from_task(create_task(user=user)).save()
+
+        user.delete()
+
+        for model in (Task, ArchivedTask, TaskTombstone):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.using(shard).exists())
@@ -0,0 +1,105 @@
+"""Test keyset pagination of the task list."""
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from todo.models import Task
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+class TaskPaginationTests(TestCase):
+    """Test cases for paging through the task list."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='pager@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.tasks = []
+        for i in range(5):
+            task = Task.objects.create(user=self.user, name=f'Task {i}')
+            # Give two tasks the same timestamp to exercise the id tie-break.
+            created_on = now - timedelta(minutes=min(i, 3))
+            Task.objects.for_user(self.user).filter(pk=task.pk).update(
+                created_on=created_on)
+            self.tasks.append(task)
+
+    def collect(self, url):
+        """Follow `next` links and return all ids and the pages seen."""
+        ids, pages = [], 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in res.data['results'])
+            url = res.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_pages_cover_all_tasks_newest_first(self):
+        """Test following next links returns every task exactly once."""
+        ids, pages = self.collect(TASK_URL + '?page_size=2')
+
+        expected = list(
+            Task.objects.for_user(self.user).order_by('-created_on', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test the previous link of the second page gives the first page."""
+        first = self.client.get(TASK_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_other_users_tasks_not_paged(self):
+        """Test only the authenticated user's tasks are returned."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        Task.objects.create(user=other, name='Not mine')
+
+        ids, _ = self.collect(TASK_URL)
+
+        self.assertEqual(len(ids), 5)
+
+    def test_invalid_cursor_returns_404(self):
+        """Test a tampered cursor is rejected."""
+        res = self.client.get(TASK_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_forged_cursor_returns_404(self):
+        """Test a well-encoded cursor with invalid values is rejected."""
+        positions = [
+            ['notadate', 'x'],
+            [1, 2],
+            [None, None],
+            [{'dt': '2024-01-01T00:00:00+00:00'}, 'not-a-uuid'],
+            [{'dt': '2024-01-01T00:00:00'}, str(self.tasks[0].id)],
+            {'dt': '2024-01-01T00:00:00+00:00'},
+        ]
+        for position in positions:
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position}).encode()).decode()
+            for params in ({}, {'ordering': 'updated_on'}):
+                with self.subTest(position=position, **params):
+                    res = self.client.get(TASK_URL,
+                                          {'cursor': cursor, **params})
+
+                    self.assertEqual(res.status_code,
+                                     status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,65 @@
+"""Test the number of queries run by the task endpoints."""
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.models import Task
+from todo.sharding import get_task_shard
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+class TaskQueryCountTests(TestCase):
+    """Test the task endpoints do not query the owner per row."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='queries@example.com', password='testpass123', name='Owner')
+        self.client.force_authenticate(self.user)
+        self.using = get_task_shard(self.user) or 'default'
+
+    def create_tasks(self, count):
+        """Create `count` tasks for the user."""
+        Task.objects.bulk_create(
+            Task(user=self.user, name=f'Task {i}') for i in range(count)
+        )
+
+    def test_list_query_count_independent_of_size(self):
+        """Test listing runs the same queries however many tasks exist."""
+        for count in (3, 30):
+            Task.objects.for_user(self.user).delete()
+            self.create_tasks(count)
+
+            # One query for the ETag validator, one for the page.
+            with self.assertNumQueries(2, using=self.using):
+                res = self.client.get(TASK_URL)
+
+            self.assertEqual(len(res.data['results']), count)
+            self.assertEqual(res.data['results'][0]['user']['name'], 'Owner')
+
+    def test_detail_single_query(self):
+        """Test retrieving a task runs the same queries as the list."""
+        task = Task.objects.create(user=self.user, name='Only task')
+
+        with self.assertNumQueries(2, using=self.using):
+            res = self.client.get(reverse('todo:task-detail', args=[task.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['user']['email'], self.user.email)
+
+    def test_user_repr_id(self):
+        """Test `?user_repr=id` returns only the owner id."""
+        self.create_tasks(2)
+
+        res = self.client.get(TASK_URL, {'user_repr': 'id'})
+
+        self.assertEqual(
+            [task['user'] for task in res.data['results']],
+            [self.user.id, self.user.id],
+        )
@@ -0,0 +1,126 @@
+"""Test the JSON and MessagePack renderers and parsers."""
+import json
+import uuid
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from todo.models import Task
+from todo.parsers import FastJSONParser, MessagePackParser
+from todo.renderers import FastJSONRenderer
+
+
+TASK_URL = reverse('todo:task-list')
+
+PAYLOAD = {
+    'id': uuid.UUID('01890a5d-ac96-774b-bcce-b302099a8057'),
+    'name': 'Caf\u00e9 \u2028 line \u2029',
+    'when': timezone.now(),
+    'amount': Decimal('1.50'),
+    'lazy': gettext_lazy('Invalid cursor'),
+    'items': [1, 2.5, None, True, ('a', 'b')],
+    'big': 2 ** 70,
+}
+
+
+class FastJSONTests(SimpleTestCase):
+    """Test FastJSONRenderer and FastJSONParser match the DRF classes."""
+
+    def test_render_matches_json_renderer(self):
+        """Test the output is byte for byte the same as JSONRenderer."""
+        expected = JSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+        with mock.patch('todo.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+
+    def test_render_indented(self):
+        """Test indented output is left to the stdlib encoder."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type))
+
+    def test_parse(self):
+        """Test parsing with and without orjson."""
+        body = json.dumps({'name': 'Café', 'done': True}).encode()
+
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)),
+                         {'name': 'Café', 'done': True})
+        with mock.patch('todo.parsers.orjson', None):
+            self.assertEqual(FastJSONParser().parse(BytesIO(body)),
+                             {'name': 'Café', 'done': True})
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a ParseError."""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"name": NaN}'))
+
+    def test_msgpack_parse_error(self):
+        """Test invalid MessagePack raises a ParseError."""
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(BytesIO(b'\xc1'))
+
+
+class ContentNegotiationTests(TestCase):
+    """Test the API answers in JSON and MessagePack alike."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='formats@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Task.objects.create(user=self.user, name='Café task')
+
+    def assertEquivalent(self, url):
+        json_res = self.client.get(url, HTTP_ACCEPT='application/json')
+        msgpack_res = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(msgpack_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(msgpack_res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(msgpack_res.content),
+                         json.loads(json_res.content))
+
+    def test_list_equivalent(self):
+        """Test the task list is the same data in both formats."""
+        self.assertEquivalent(TASK_URL)
+
+    def test_profile_equivalent(self):
+        """Test the profile is the same data in both formats."""
+        self.assertEquivalent(reverse('todo:profile'))
+
+    def test_formats_have_their_own_etag(self):
+        """Test a JSON ETag does not validate the MessagePack response."""
+        json_res = self.client.get(TASK_URL, HTTP_ACCEPT='application/json')
+
+        res = self.client.get(TASK_URL, HTTP_ACCEPT='application/msgpack',
+                              HTTP_IF_NONE_MATCH=json_res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Accept', res['Vary'])
+
+    def test_create_task_from_msgpack(self):
+        """Test a MessagePack request body creates a task."""
+        res = self.client.post(
+            TASK_URL, msgpack.packb({'name': 'Packed task', 'done': True}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(res.content)['name'], 'Packed task')
+        self.assertTrue(
+            Task.objects.for_user(self.user).get(name='Packed task').done)
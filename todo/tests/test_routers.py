@@ -0,0 +1,118 @@
+"""Test routing reads to the read replicas."""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from todo.models import Task
+from todo.routers import (ReplicaReadMixin, ReplicaRouter, _read_database,
+                          is_pinned, pin_to_primary)
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+class DatabaseView(ReplicaReadMixin, APIView):
+    """Answer with the database the request reads from."""
+
+    def get(self, request):
+        return Response(_read_database.get())
+
+    def post(self, request):
+        return Response(_read_database.get(), status=status.HTTP_201_CREATED)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(TestCase):
+    """Test cases for choosing the database of a request."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email='replica@example.com', password='testpass123')
+
+    def call(self, method):
+        request = getattr(self.factory, method)('/')
+        force_authenticate(request, self.user)
+        return DatabaseView.as_view()(request)
+
+    def test_reads_go_to_a_replica(self):
+        """Test a safe request reads from one of the replicas."""
+        self.assertIn(self.call('get').data, settings.DATABASE_REPLICAS)
+        self.assertIsNone(_read_database.get())
+
+    def test_writes_use_the_primary_and_pin(self):
+        """Test a write reads from the primary and pins the user."""
+        self.assertIsNone(self.call('post').data)
+        self.assertTrue(is_pinned(self.user.pk))
+
+    def test_pinned_user_reads_from_primary(self):
+        """Test reads stay on the primary after a recent write."""
+        pin_to_primary(self.user.pk)
+
+        self.assertIsNone(self.call('get').data)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test everything goes to the primary without replicas."""
+        self.assertIsNone(self.call('get').data)
+
+    def test_router(self):
+        """Test the router follows the request's read database."""
+        router = ReplicaRouter()
+        token = _read_database.set('replica2')
+        try:
+            self.assertEqual(router.db_for_read(Task), 'replica2')
+            self.assertEqual(router.db_for_write(Task), 'default')
+        finally:
+            _read_database.reset(token)
+        self.assertIsNone(router.db_for_read(Task))
+
+
+def has_separate_replica():
+    """Whether a replica has its own test database instead of a mirror."""
+    return any(not settings.DATABASES[alias].get('TEST', {}).get('MIRROR')
+               for alias in settings.DATABASE_REPLICAS)
+
+
+@skipUnless(
+    has_separate_replica(),
+    'Set DATABASE_REPLICA_URLS to a SQLite file to test against a replica.')
+class ReplicaIntegrationTests(TestCase):
+    """
+    Test the task list against a separate replica database, which never
+    receives the primary's writes, so every read shows where it went.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='replica@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Task.objects.create(user=self.user, name='Primary only')
+
+    def test_list_reads_replica(self):
+        """Test the list is read from the replica."""
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_read_your_writes(self):
+        """Test a user sees their own write right away."""
+        self.client.post(TASK_URL, {'name': 'New task'})
+
+        res = self.client.get(TASK_URL)
+
+        self.assertEqual(sorted(task['name'] for task in res.data['results']),
+                         ['New task', 'Primary only'])
@@ -0,0 +1,114 @@
+"""Test the cached OpenAPI schema."""
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from todo import schema
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """Test cases for serving the schema from the cache."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = Path(temp_dir.name)
+        settings_override = override_settings(SCHEMA_CACHE_DIR=temp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
+        get_schema = SchemaGenerator.get_schema
+        patcher = mock.patch.object(SchemaGenerator, 'get_schema',
+                                    autospec=True, side_effect=get_schema)
+        self.get_schema = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_schema_generated_once(self):
+        """Test repeat requests reuse the rendered schema."""
+        first = self.client.get(SCHEMA_URL)
+        second = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'openapi:', first.content)
+        self.assertEqual(self.get_schema.call_count, 1)
+
+    def test_formats_cached_separately(self):
+        """Test the JSON schema is not served for a YAML request."""
+        yaml_res = self.client.get(SCHEMA_URL)
+        json_res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertTrue(json_res.content.startswith(b'{'))
+        self.assertNotEqual(yaml_res['ETag'], json_res['ETag'])
+        self.assertEqual(json_res['Content-Type'],
+                         'application/vnd.oai.openapi+json')
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_served_from_disk(self):
+        """Test a new process reads the schema written to disk."""
+        content = self.client.get(SCHEMA_URL).content
+        schema.clear_schema_cache()
+
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.content, content)
+        self.assertEqual(self.get_schema.call_count, 1)
+
+    def test_code_change_invalidates(self):
+        """Test a new code hash builds the schema again."""
+        self.client.get(SCHEMA_URL)
+
+        with mock.patch.object(schema, 'get_code_hash', return_value='new'):
+            self.client.get(SCHEMA_URL)
+
+        self.assertEqual(self.get_schema.call_count, 2)
+
+    def test_disk_write_failure(self):
+        """Test a failed write leaves no file behind and still serves."""
+        with mock.patch.object(schema.os, 'replace', side_effect=OSError):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_build_schema_command(self):
+        """Test the command prebuilds the schemas and prunes stale ones."""
+        (self.cache_dir / 'old-hash-schema').write_bytes(b'stale')
+        out = StringIO()
+
+        call_command('build_schema', stdout=out)
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_schema.call_count, 2)
+        self.assertFalse((self.cache_dir / 'old-hash-schema').exists())
+        self.assertIn('removed 1 stale', out.getvalue())
+
+    def test_build_schema_command_failure(self):
+        """Test a schema that cannot be built fails the command."""
+        self.get_schema.side_effect = APIException('Broken view')
+
+        with self.assertRaisesMessage(CommandError, 'failed with status 500'):
+            call_command('build_schema', stdout=StringIO())
@@ -0,0 +1,89 @@
+"""Test searching tasks by name."""
+from unittest import mock
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast, Length
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from todo.filters import TaskSearchFilter
+from todo.models import Task
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TASK_URL = reverse('todo:task-list')
+
+
+class TaskSearchTests(TestCase):
+    """Test cases for the `?search=` parameter."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='search@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        for name in ['Buy milk', 'Buy bread', 'Walk the dog', 'MILK the cow']:
+            Task.objects.create(user=self.user, name=name)
+
+    def search(self, term, **params):
+        res = self.client.get(TASK_URL, {'search': term, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_search_case_insensitive_substring(self):
+        """Test tasks containing the term in any case are returned."""
+        data = self.search('milk')
+
+        self.assertEqual(sorted(task['name'] for task in data['results']),
+                         ['Buy milk', 'MILK the cow'])
+
+    def test_search_excludes_other_users(self):
+        """Test another user's matching tasks are not returned."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        Task.objects.create(user=other, name='Buy milk too')
+
+        data = self.search('milk')
+
+        self.assertEqual(len(data['results']), 2)
+
+    def test_search_paginated(self):
+        """Test search results are paged like the plain list."""
+        first = self.search('buy', page_size=1)
+        second = self.client.get(first['next']).data
+
+        names = [task['name'] for task in first['results'] + second['results']]
+        self.assertEqual(sorted(names), ['Buy bread', 'Buy milk'])
+        self.assertIsNone(second['next'])
+
+    def test_ranked_search_paginated(self):
+        """Test ranked search results are paged past the first page."""
+        # Rank on the name length, a portable stand-in for the trigram
+        # similarity, so the cursor holds an annotation on every database.
+        patcher = mock.patch.object(
+            TaskSearchFilter, 'get_rank',
+            lambda self, queryset, term: Cast(Length('name'), FloatField()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Task.objects.create(user=self.user, name='Buy eggs')
+
+        data = self.search('buy', page_size=1)
+        names = [task['name'] for task in data['results']]
+        while data['next']:
+            res = self.client.get(data['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            data = res.data
+            names.extend(task['name'] for task in data['results'])
+
+        # Longest first, ties broken by the newest id.
+        self.assertEqual(names, ['Buy bread', 'Buy eggs', 'Buy milk'])
+
+    def test_search_term_too_long(self):
+        """Test an overly long search term is rejected."""
+        res = self.client.get(TASK_URL, {'search': 'x' * 101})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,172 @@
+"""Test sharding tasks across databases by user."""
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from todo.models import ArchivedTask, Task, TaskTombstone, User
+from todo.sharding import get_task_shard, shard_for_user_id
+
+
+TASK_URL = reverse('todo:task-list')
+TASK_BULK_URL = reverse('todo:task-bulk')
+CHANGES_URL = reverse('todo:task-changes')
+SHARDS = ['default', 'shard1', 'shard2']
+
+
+def detail_url(task_id):
+    return reverse('todo:task-detail', args=[task_id])
+
+
+class ShardMappingTests(SimpleTestCase):
+    """Test cases for choosing a user's shard."""
+
+    @override_settings(TASK_SHARDS=SHARDS)
+    def test_mapping_is_deterministic(self):
+        """Test user ids are spread over every shard."""
+        self.assertEqual([shard_for_user_id(pk) for pk in range(6)],
+                         SHARDS * 2)
+
+    @override_settings(TASK_SHARDS=SHARDS)
+    def test_recorded_shard_wins(self):
+        """Test the shard stored on the user is used."""
+        user = User(pk=1, task_shard='shard2')
+
+        self.assertEqual(get_task_shard(user), 'shard2')
+
+    @override_settings(TASK_SHARDS=SHARDS)
+    def test_unknown_shard_falls_back_to_mapping(self):
+        """Test users without a valid shard use the mapping."""
+        self.assertEqual(get_task_shard(User(pk=4, task_shard='')), 'shard1')
+
+    @override_settings(TASK_SHARDS=['default'])
+    def test_not_sharded(self):
+        """Test the routers decide without sharding."""
+        self.assertIsNone(get_task_shard(User(pk=1, task_shard='default')))
+
+
+@skipUnless(
+    len(settings.TASK_SHARDS) > 1,
+    'Set DATABASE_SHARD_URLS to SQLite files to test against shards.')
+class ShardedTaskTests(TestCase):
+    """Test the task API and commands against several databases."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # Create users until one lands on a shard other than `default`.
+        index = 0
+        while True:
+            self.user = get_user_model().objects.create_user(
+                email=f'shard{index}@example.com', password='testpass123')
+            if self.user.task_shard != 'default':
+                break
+            index += 1
+        self.shard = self.user.task_shard
+        self.client.force_authenticate(self.user)
+
+    def shard_tasks(self, shard=None):
+        return Task.objects.using(shard or self.shard).filter(user=self.user)
+
+    def test_user_gets_a_shard(self):
+        """Test a new user is assigned their mapped shard."""
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.task_shard,
+                         shard_for_user_id(self.user.pk))
+
+    def test_api_uses_the_users_shard(self):
+        """Test creating, listing, updating and deleting on the shard."""
+        res = self.client.post(TASK_URL, {'name': 'Sharded task'})
+        task_id = res.data['id']
+        self.client.post(TASK_BULK_URL, [{'name': 'Bulk one'},
+                                         {'name': 'Bulk two'}],
+                         format='json')
+
+        self.assertEqual(self.shard_tasks().count(), 3)
+        self.assertFalse(Task.objects.using('default').exists())
+
+        res = self.client.get(TASK_URL)
+        self.assertEqual(len(res.data['results']), 3)
+
+        res = self.client.patch(detail_url(task_id), {'done': True})
+        self.assertTrue(res.data['done'])
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.task_count, self.user.done_task_count),
+                         (3, 1))
+
+        self.client.delete(detail_url(task_id))
+        res = self.client.get(CHANGES_URL)
+        self.assertEqual(self.shard_tasks().count(), 2)
+        self.assertEqual(TaskTombstone.objects.using(self.shard).count(), 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleting_user_deletes_sharded_tasks(self):
+        """Test the user's tasks are deleted from their shard."""
+        Task.objects.create(user=self.user, name='Doomed task')
+
+        self.user.delete()
+
+        self.assertFalse(Task.objects.using(self.shard).exists())
+
+    def test_archive_on_shard(self):
+        """Test tasks are archived and read back on the user's shard."""
+        task = Task.objects.create(user=self.user, name='Old task', done=True)
+
+        call_command('archive_tasks', days=-1, stdout=StringIO())
+
+        self.assertTrue(ArchivedTask.objects.using(self.shard).filter(
+            pk=task.pk).exists())
+        res = self.client.get(TASK_URL, {'include_archived': 'true'})
+        self.assertEqual([item['id'] for item in res.data['results']],
+                         [str(task.pk)])
+
+    def test_rebalance_needs_shared_token_cache(self):
+        """Test a user is not moved while workers cache tokens locally."""
+        with self.assertRaisesMessage(CommandError, 'token cache shared'):
+            call_command('rebalance_task_shard', self.user.email, 'default',
+                         stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.task_shard, self.shard)
+        self.assertTrue(self.user.is_active)
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={'BACKEND': 'django', 'CACHE_ALIAS': 'tokens'},
+        CACHES={**settings.CACHES, 'tokens': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_rebalance(self):
+        """Test moving a user keeps their tasks, timestamps and counters."""
+        task = Task.objects.create(user=self.user, name='Moving task')
+        Task.objects.create(user=self.user, name='Deleted task').delete()
+        out = StringIO()
+
+        call_command('rebalance_task_shard', self.user.email, 'default',
+                     stdout=out)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.task_shard, 'default')
+        self.assertTrue(self.user.is_active)
+        self.assertFalse(self.shard_tasks().exists())
+        moved = self.shard_tasks('default').get()
+        self.assertEqual((moved.pk, moved.created_on, moved.updated_on),
+                         (task.pk, task.created_on, task.updated_on))
+        self.assertEqual(
+            TaskTombstone.objects.using('default').filter(
+                user=self.user).count(), 1)
+        self.assertEqual(self.user.task_count, 1)
+        self.assertIn('Moved 1 tasks and 1 tombstones', out.getvalue())
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(TASK_URL)
+        self.assertEqual([item['id'] for item in res.data['results']],
+                         [str(task.pk)])
@@ -0,0 +1,158 @@
+"""Test the delta sync endpoint."""
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from todo.models import Task, TaskTombstone
+from todo.sharding import get_task_shard
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+CHANGES_URL = reverse('todo:task-changes')
+
+
+@override_settings(TASK_SYNC_SETTLE_SECONDS=0)
+class TaskChangesAPITests(TestCase):
+    """Test cases for syncing task changes."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='sync@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, name='Synced task')
+
+    def sync(self, token=None, **params):
+        if token:
+            params['since'] = token
+        res = self.client.get(CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_initial_sync_returns_all_tasks(self):
+        """Test syncing without a token returns every task."""
+        data = self.sync()
+
+        self.assertEqual([task['id'] for task in data['tasks']],
+                         [str(self.task.id)])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_only_changes_since_token(self):
+        """Test a token only returns tasks written after it."""
+        token = self.sync()['token']
+        new = Task.objects.create(user=self.user, name='New task')
+
+        data = self.sync(token)
+
+        self.assertEqual([task['id'] for task in data['tasks']],
+                         [str(new.id)])
+        self.assertEqual(self.sync(data['token'])['tasks'], [])
+
+    def test_deleted_tasks_returned_as_tombstones(self):
+        """Test deleting a task through the API leaves a tombstone."""
+        token = self.sync()['token']
+        self.client.delete(reverse('todo:task-detail', args=[self.task.id]))
+
+        data = self.sync(token)
+
+        self.assertEqual(data['tasks'], [])
+        self.assertEqual([item['id'] for item in data['deleted']],
+                         [str(self.task.id)])
+
+    def test_bulk_delete_leaves_tombstones(self):
+        """Test queryset deletes also record tombstones."""
+        Task.objects.for_user(self.user).delete()
+
+        self.assertEqual(
+            list(TaskTombstone.objects.using(get_task_shard(self.user))
+                 .values_list('task_id', flat=True)),
+            [self.task.id])
+
+    def test_changes_paged_by_limit(self):
+        """Test more changes than the limit are returned over several calls."""
+        for i in range(4):
+            Task.objects.create(user=self.user, name=f'Task {i}')
+
+        first = self.sync(page_size=3)
+        second = self.sync(first['token'], page_size=3)
+
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        ids = [task['id'] for task in first['tasks'] + second['tasks']]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected."""
+        res = self.client.get(CHANGES_URL, {'since': 'garbage'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forged_token(self):
+        """Test a well-encoded token with invalid positions is rejected."""
+        now = {'dt': timezone.now().isoformat()}
+        payloads = [
+            {'t': None, 'd': [1, 2]},
+            {'t': None, 'd': ['x', 0]},
+            {'t': None, 'd': [now, 'x']},
+            {'t': ['x', 'y'], 'd': [now, 0]},
+            {'t': [now, 'not-a-uuid'], 'd': [now, 0]},
+            {'t': 'x', 'd': [now, 0]},
+            {'t': None, 'd': {'dt': 'x'}},
+        ]
+        for payload in payloads:
+            token = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            with self.subTest(payload=payload):
+                res = self.client.get(CHANGES_URL, {'since': token})
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_queryset_update_is_synced(self):
+        """Test tasks changed with `update()` are sent as changes."""
+        token = self.sync()['token']
+
+        Task.objects.for_user(self.user).filter(pk=self.task.pk).update(
+            done=True)
+
+        data = self.sync(token)
+        self.assertEqual([task['id'] for task in data['tasks']],
+                         [str(self.task.id)])
+
+    @override_settings(TASK_TOMBSTONE_RETENTION_DAYS=0)
+    def test_expired_token(self):
+        """Test a token older than the retention period needs a resync."""
+        token = self.sync()['token']
+
+        res = self.client.get(CHANGES_URL, {'since': token})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+
+class PruneTombstonesCommandTests(TestCase):
+    """Test cases for the prune_tombstones command."""
+    databases = '__all__'
+
+    def test_old_tombstones_pruned(self):
+        """Test tombstones past the retention period are deleted."""
+        user = get_user_model().objects.create_user(
+            email='prune@example.com', password='testpass123')
+        tombstones = TaskTombstone.objects.using(get_task_shard(user))
+        old = tombstones.create(task_id=Task().id, user=user)
+        recent = tombstones.create(task_id=Task().id, user=user)
+        tombstones.filter(pk=old.pk).update(
+            deleted_on=timezone.now() - timedelta(days=31))
+
+        call_command('prune_tombstones', stdout=StringIO())
+
+        self.assertEqual(list(tombstones.all()), [recent])
@@ -0,0 +1,36 @@
+"""Test the todo helpers."""
+import time
+
+from django.test import SimpleTestCase
+
+from todo.utils import uuid7
+
+
+class UUID7Tests(SimpleTestCase):
+    """Test cases for time-ordered UUIDs."""
+
+    def test_version_and_variant(self):
+        """Test the generated UUID is a RFC 9562 version 7 UUID."""
+        value = uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, 'specified in RFC 4122')
+
+    def test_embeds_current_time(self):
+        """Test the first 48 bits hold the Unix time in milliseconds."""
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+
+        self.assertTrue(before <= value.int >> 80 <= after)
+
+    def test_sorted_by_creation(self):
+        """Test UUIDs generated later sort after earlier ones."""
+        values = []
+        for _ in range(5):
+            values.append(uuid7())
+            time.sleep(0.001)
+
+        self.assertEqual(sorted(values), values)
+        self.assertEqual(sorted(str(value) for value in values),
+                         [str(value) for value in values])
@@ -2,7 +2,10 @@ from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from todo.views import UserRegisterAPIView, CreateTokenView, UserProfileView, TaskViewSet
+from todo.views import (UserRegisterAPIView, CreateTokenView, UserProfileView,
+                        UserTaskStatsView, TaskViewSet)
+from todo.async_views import (AsyncTaskListView, AsyncTaskDetailView,
+                              AsyncUserProfileView, TaskEventsView)
 
 
 app_name = 'todo'
@@ -14,6 +17,14 @@ urlpatterns = [
     path("user/register/", UserRegisterAPIView.as_view(), name="register"),
     path("user/login/", CreateTokenView.as_view(), name="login"),
     path("user/profile/", UserProfileView.as_view(), name="profile"),
+    path("user/stats/", UserTaskStatsView.as_view(), name="stats"),
+    
+    path("async/task/", AsyncTaskListView.as_view(), name="async-task-list"),
+    path("async/task/<str:pk>/", AsyncTaskDetailView.as_view(),
+         name="async-task-detail"),
+    path("async/user/profile/", AsyncUserProfileView.as_view(),
+         name="async-profile"),
+    path("task/events/", TaskEventsView.as_view(), name="task-events"),
     
     path("", include(router.urls)),    
 ]
\ No newline at end of file
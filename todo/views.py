@@ -1,17 +1,62 @@
 """Views for api end points"""
+import hashlib
 
-from rest_framework import generics, authentication, permissions, viewsets
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import gettext as _
+
+from drf_spectacular.utils import (OpenApiParameter, extend_schema,
+                                   extend_schema_view)
+from rest_framework import (generics, permissions, viewsets,
+                            serializers as drf_serializers, status)
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 from todo import serializers
-from todo.models import Task
+from todo.authentication import CachedTokenAuthentication
+from todo.cache import get_response_key, get_response_timeout
+from todo.deletion import schedule_account_deletion
+from todo.export import aiter_export, iter_export
+from todo.filters import SparseFieldsetFilter, TaskFilter, TaskSearchFilter
+from todo.idempotency import HEADER as IDEMPOTENCY_HEADER, idempotent
+from todo.importer import (InvalidEncoding, check_encoding, guess_format,
+                           import_tasks, iter_rows)
+from todo.models import ArchivedTask, Task, User
+from todo.pagination import KeysetPagination
+from todo.renderers import (FastJSONRenderer, MessagePackRenderer,
+                            NDJSONRenderer)
+from todo.routers import ReplicaReadMixin
+from todo.sync import ExpiredToken, InvalidToken, get_changes
+
+
+IDEMPOTENCY_KEY = extend_schema(parameters=[OpenApiParameter(
+    IDEMPOTENCY_HEADER, str, OpenApiParameter.HEADER,
+    description='Unique key of the request. Retries sent with the same key '
+                'get the response of the first request instead of '
+                'writing again.')])
 
 
 class UserRegisterAPIView(generics.CreateAPIView):
     """API View Class to create a new user."""
     serializer_class = serializers.UserSerializer
     
+    @IDEMPOTENCY_KEY
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+    
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new token for the authenticated user."""
@@ -19,26 +64,493 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     
     
-class UserProfileView(generics.RetrieveUpdateAPIView):
-    """View class to get and update the user."""
+class UserProfileView(ReplicaReadMixin,
+                      generics.RetrieveUpdateDestroyAPIView):
+    """View class to get, update and delete the user."""
     serializer_class = serializers.UserSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     
     def get_object(self):
         """Retrieve and update the user."""
         return self.request.user
     
+    @IDEMPOTENCY_KEY
+    @idempotent
+    def patch(self, request, *args, **kwargs):
+        return super().patch(request, *args, **kwargs)
+    
+    @extend_schema(responses={status.HTTP_202_ACCEPTED: None})
+    def delete(self, request, *args, **kwargs):
+        """
+        Deactivate the user at once and leave deleting the account to
+        the `delete_accounts` worker.
+        """
+        schedule_account_deletion(request.user)
+        return Response(status=status.HTTP_202_ACCEPTED)
+    
 
-class TaskViewSet(viewsets.ModelViewSet):
+class UserTaskStatsView(ReplicaReadMixin, generics.RetrieveAPIView):
+    """Return the user's task counts without counting the tasks."""
+    serializer_class = serializers.UserTaskStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_object(self):
+        # request.user may come from the token cache, so read the
+        # counters from the database.
+        return User.objects.only('task_count', 'done_task_count').get(
+            pk=self.request.user.pk)
+    
+
+INCLUDE_ARCHIVED = extend_schema(parameters=[OpenApiParameter(
+    'include_archived', bool,
+    description='Include the archived tasks, which are read-only.')])
+
+
+@extend_schema_view(list=INCLUDE_ARCHIVED, retrieve=INCLUDE_ARCHIVED,
+                    export=INCLUDE_ARCHIVED, create=IDEMPOTENCY_KEY,
+                    partial_update=IDEMPOTENCY_KEY, bulk=IDEMPOTENCY_KEY)
+class TaskViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """View class to manage task endpoint."""
     queryset = Task.objects.all()
     serializer_class = serializers.TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [TaskSearchFilter, TaskFilter, SparseFieldsetFilter]
+    export_chunk_size = 2000
     
     def get_queryset(self):
         """Retrieve tasks for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        return self.queryset.for_user(self.request.user)
+    
+    def include_archived(self):
+        """Whether a read passed `?include_archived=true`."""
+        value = self.request.query_params.get('include_archived')
+        if value is None or self.request.method != 'GET':
+            return False
+        try:
+            return drf_serializers.BooleanField().to_internal_value(value)
+        except ValidationError as exc:
+            raise ValidationError({'include_archived': exc.detail})
+    
+    def get_querysets(self):
+        """
+        Return the querysets reads look in: the user's tasks and, with
+        `?include_archived=`, their archived tasks after them.
+        """
+        querysets = [self.get_queryset()]
+        if self.include_archived():
+            querysets.append(ArchivedTask.objects.for_user(self.request.user))
+        return querysets
+    
+    def get_object(self, fields=None):
+        """
+        Return the requested task from the first queryset that has it,
+        as a `values_list` row of `fields` if given.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        querysets = self.get_querysets()
+        for index, queryset in enumerate(querysets, 1):
+            queryset = self.filter_queryset(queryset)
+            if fields is not None:
+                queryset = queryset.values_list(*fields)
+            try:
+                obj = get_object_or_404(queryset, **filter_kwargs)
+            except Http404:
+                if index == len(querysets):
+                    raise
+                continue
+            self.check_object_permissions(self.request, obj)
+            return obj
+    
+    def get_serializer_class(self):
+        """Return only the owner id when `?user_repr=id` is passed."""
+        if self.action == 'bulk_destroy':
+            return serializers.TaskBulkDeleteSerializer
+        if self.action == 'import_tasks':
+            return serializers.TaskImportSerializer
+        if self.request.query_params.get('user_repr') == 'id':
+            return serializers.TaskUserIdSerializer
+        return self.serializer_class
+    
+    def get_sparse_fields(self):
+        """
+        Return the field names passed in `?fields=` on reads, or None to
+        return every field. Unknown names are rejected with a 400.
+        """
+        value = self.request.query_params.get('fields')
+        if not value or self.request.method != 'GET':
+            return None
+        
+        fields = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = fields - set(self.get_serializer_class()().fields)
+        if unknown:
+            raise ValidationError({'fields': [
+                _('Unknown fields: {fields}.').format(
+                    fields=', '.join(sorted(unknown)))]})
+        return fields
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        return context
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.cached_response, self.fast_list, request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.cached_response, self.fast_retrieve, request, *args, **kwargs)
+    
+    def get_fast_serializer(self):
+        """
+        Return a `FastTaskSerializer` matching the serializer of the
+        request, or None if it can only be rendered the regular way.
+        """
+        return serializers.FastTaskSerializer.build(self.get_serializer(),
+                                                    self.request.user)
+    
+    def fast_list(self, request, *args, **kwargs):
+        """
+        List the tasks from `values_list` rows when possible. With the
+        archive included, both tables are paginated as one list.
+        """
+        fast = self.get_fast_serializer()
+        querysets = [self.filter_queryset(queryset)
+                     for queryset in self.get_querysets()]
+        if fast is not None:
+            # The paginator reads the cursor position from the row, so
+            # the ordering columns are fetched too.
+            ordering = self.paginator.get_ordering(request, querysets[0],
+                                                   self)
+            columns = fast.columns + [
+                field.lstrip('-') for field in ordering
+                if field.lstrip('-') not in fast.columns]
+            querysets = [queryset.values_list(*columns, named=True)
+                         for queryset in querysets]
+        
+        if len(querysets) == 1:
+            page = self.paginate_queryset(querysets[0])
+        else:
+            page = self.paginator.paginate_querysets(querysets, request, self)
+        if fast is None:
+            data = self.get_serializer(page, many=True).data
+        else:
+            data = [fast.to_representation(row) for row in page]
+        return self.get_paginated_response(data)
+    
+    def fast_retrieve(self, request, *args, **kwargs):
+        """Retrieve a task from a `values_list` row when possible."""
+        fast = self.get_fast_serializer()
+        if fast is None:
+            return super().retrieve(request, *args, **kwargs)
+        
+        row = self.get_object(fast.columns)
+        return Response(fast.to_representation(row))
+    
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
+    @idempotent
+    def partial_update(self, request, *args, **kwargs):
+        return super().partial_update(request, *args, **kwargs)
+    
+    def update(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().update, request, *args, **kwargs)
+    
+    def destroy(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().destroy, request, *args, **kwargs)
+    
+    def get_validator(self, for_update=False):
+        """
+        Return the `(etag, last_modified)` validator of the task list or of
+        the requested task, or None if the task does not exist.
+        
+        The list validator is built from the count and latest `updated_on`
+        of the user's tasks plus the request URL, so every page has its own
+        ETag. A task's validator is its id and `updated_on`. With
+        `for_update`, the task is read from the database and its row
+        locked until the end of the transaction.
+        """
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        querysets = self.get_querysets()
+        key = get_response_key(
+            self.request.user.id,
+            f'validator:{lookup or "list"}:{len(querysets)}')
+        state = None if for_update else cache.get(key)
+        if state is None:
+            if lookup is None:
+                count, last_modified = 0, None
+                for queryset in querysets:
+                    stats = queryset.aggregate(
+                        count=Count('pk'), last_modified=Max('updated_on'))
+                    count += stats['count']
+                    last_modified = max(
+                        filter(None, [last_modified, stats['last_modified']]),
+                        default=None)
+                state = (count, last_modified)
+            else:
+                state = (lookup, None)
+                for queryset in querysets:
+                    if for_update:
+                        queryset = queryset.select_for_update()
+                    try:
+                        updated_on = queryset.filter(pk=lookup).values_list(
+                            'updated_on', flat=True).first()
+                    except (DjangoValidationError, TypeError, ValueError):
+                        return None
+                    if updated_on is not None:
+                        state = (lookup, updated_on)
+                        break
+                if state[1] is None:
+                    return None
+            cache.set(key, state, get_response_timeout())
+        
+        last_modified = state[-1]
+        if lookup is None:
+            state += (self.request.build_absolute_uri(),)
+        elif self.get_sparse_fields() is not None:
+            state += (sorted(self.get_sparse_fields()),)
+        # Each format is its own representation; JSON keeps the plain tag.
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if renderer is not None and renderer.format != 'json':
+            state += (renderer.format,)
+        etag = quote_etag(hashlib.md5(repr(state).encode()).hexdigest())
+        return etag, last_modified and int(last_modified.timestamp())
+    
+    def conditional_response(self, handler, *args, **kwargs):
+        """
+        Answer If-None-Match/If-Modified-Since with 304 and a failed
+        If-Match/If-Unmodified-Since with 412 before running `handler`.
+        
+        Writes check and run in one transaction holding the task's row
+        lock, so two writes sent with the same If-Match cannot both pass.
+        """
+        if self.request.method in permissions.SAFE_METHODS:
+            return self._conditional_response(False, handler, *args, **kwargs)
+        with transaction.atomic(using=self.get_queryset().db):
+            return self._conditional_response(True, handler, *args, **kwargs)
+    
+    def _conditional_response(self, for_update, handler, *args, **kwargs):
+        validator = self.get_validator(for_update)
+        if validator is None:
+            return handler(*args, **kwargs)
+        
+        etag, last_modified = validator
+        response = get_conditional_response(self.request, etag=etag,
+                                            last_modified=last_modified)
+        if response is not None:
+            if response.status_code == status.HTTP_304_NOT_MODIFIED:
+                response['ETag'] = etag
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        
+        response = handler(*args, **kwargs)
+        if (self.request.method == 'GET'
+                and response.status_code == status.HTTP_200_OK):
+            response['ETag'] = etag
+            patch_vary_headers(response, ['Accept'])
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+    
+    def cached_response(self, handler, request, *args, **kwargs):
+        """
+        Serve the response data from the user's versioned cache, or
+        build it with `handler` and store it.
+        """
+        key = get_response_key(request.user.id, request.build_absolute_uri())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, get_response_timeout())
+        return response
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
\ No newline at end of file
+        serializer.save(user=self.request.user)
+        
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def bulk(self, request):
+        """Create a list of tasks in a single insert."""
+        serializer = self.get_serializer(data=request.data, many=True,
+                                         allow_empty=False,
+                                         max_length=serializers.MAX_BULK_TASKS)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic(using=self.get_queryset().db):
+            serializer.save(user=request.user)
+        
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @IDEMPOTENCY_KEY
+    @bulk.mapping.patch
+    @idempotent
+    def bulk_partial_update(self, request):
+        """
+        Partially update a list of tasks, each identified by its `id`.
+        Nothing is saved unless every item is valid.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    _('Expected a non-empty list of tasks.')]})
+        if len(items) > serializers.MAX_BULK_TASKS:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    _('Ensure this field has no more than {max_length} '
+                      'elements.').format(
+                          max_length=serializers.MAX_BULK_TASKS)]})
+        
+        id_field = drf_serializers.UUIDField()
+        pks = []
+        for item in items:
+            try:
+                pks.append(id_field.run_validation(
+                    item.get('id') if isinstance(item, dict) else None))
+            except ValidationError:
+                pks.append(None)
+        tasks = self.get_queryset().in_bulk([pk for pk in pks if pk])
+        
+        errors, updates, seen = [], [], set()
+        for item, pk in zip(items, pks):
+            if pk is None:
+                errors.append({'id': [_('A valid task id is required.')]})
+            elif pk in seen:
+                errors.append({'id': [_('Duplicate task id.')]})
+            elif pk not in tasks:
+                errors.append({'id': [_('Not found.')]})
+            else:
+                serializer = self.get_serializer(tasks[pk], data=item,
+                                                 partial=True)
+                serializer.is_valid()
+                errors.append(serializer.errors)
+                updates.append(serializer)
+            seen.add(pk)
+        if any(errors):
+            raise ValidationError(errors)
+        
+        fields, now = {'updated_on'}, timezone.now()
+        for serializer in updates:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+                fields.add(attr)
+            serializer.instance.updated_on = now
+        instances = [serializer.instance for serializer in updates]
+        with transaction.atomic(using=self.get_queryset().db):
+            Task.objects.bulk_update(instances, fields)
+        
+        return Response(self.get_serializer(instances, many=True).data)
+    
+    # Methods mapped to an action take its schema unless annotated.
+    @extend_schema()
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete a list of tasks by id with a single statement."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        
+        queryset = self.get_queryset().filter(pk__in=ids)
+        with transaction.atomic(using=queryset.db):
+            found = set(queryset.values_list('pk', flat=True))
+            missing = {index: [_('Not found.')]
+                       for index, pk in enumerate(ids) if pk not in found}
+            if missing:
+                raise ValidationError({'ids': missing})
+            queryset.delete()
+        
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=False, use_read_replica=False)
+    def changes(self, request):
+        """
+        Return the tasks changed and deleted since `?since=<token>`, with
+        the token to pass next time. Without a token every task is sent.
+        
+        Read from the primary: on a lagging replica the token could move
+        past changes the replica has not received yet.
+        """
+        try:
+            tasks, tombstones, token, has_more = get_changes(
+                request.user, request.query_params.get('since'),
+                limit=self.paginator.get_page_size(request))
+        except InvalidToken:
+            raise ValidationError({'since': [_('Invalid sync token.')]})
+        except ExpiredToken:
+            return Response(
+                {'detail': _('Sync token expired, a full sync is required.')},
+                status=status.HTTP_410_GONE)
+        
+        return Response({
+            'tasks': self.get_serializer(tasks, many=True).data,
+            'deleted': serializers.TaskTombstoneSerializer(
+                tombstones, many=True).data,
+            'token': token,
+            'has_more': has_more,
+        })
+    
+    @action(detail=False, renderer_classes=[FastJSONRenderer, NDJSONRenderer,
+                                            MessagePackRenderer])
+    def export(self, request):
+        """
+        Stream every task of the user as a JSON array, as NDJSON with
+        `?format=ndjson` or `Accept: application/x-ndjson`, or as a
+        sequence of MessagePack objects with `?format=msgpack` or
+        `Accept: application/msgpack`. Archived tasks, when included,
+        follow the others.
+        """
+        renderer = request.accepted_renderer
+        querysets = [
+            SparseFieldsetFilter().filter_queryset(
+                request, queryset.order_by('created_on', 'id'), self)
+            for queryset in self.get_querysets()
+        ]
+        # Under ASGI, Django reads a sync iterator to the end before
+        # sending it, so stream from an async one there.
+        if isinstance(request._request, ASGIRequest):
+            export = aiter_export
+        else:
+            export = iter_export
+        response = StreamingHttpResponse(
+            export(querysets, self.get_serializer(), renderer,
+                   self.export_chunk_size),
+            content_type=renderer.media_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="tasks.{renderer.format}"')
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser])
+    def import_tasks(self, request):
+        """
+        Import tasks from an uploaded NDJSON or CSV file with `name` and
+        optional `done` columns. The file is read incrementally and saved
+        in batches; invalid rows are skipped and reported by line.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        fmt = (serializer.validated_data.get('format')
+               or guess_format(upload.name))
+        if fmt is None:
+            raise ValidationError(
+                {'format': [_('Could not tell the format from the file name.')]})
+        try:
+            check_encoding(upload.file)
+        except InvalidEncoding:
+            raise ValidationError({'file': [_('The file is not valid UTF-8.')]})
+        
+        summary = import_tasks(request.user, iter_rows(upload.file, fmt),
+                               serializer.validated_data['batch_size'])
+        return Response(summary)